@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# Поднимаем версию при изменении полей пользователя: старые записи
+# перестанут читаться и вытеснятся.
+USER_CACHE_VERSION = 1
+USER_CACHE_TIMEOUT = 60 * 60 * 24
+
+User = get_user_model()
+
+
+def user_key(user_id):
+    return f'auth.user.v{USER_CACHE_VERSION}.{user_id}'
+
+
+def _fields():
+    return [field.attname for field in User._meta.concrete_fields]
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` that loads the session's user from the cache.
+
+    The user row is cached as a bare tuple of its column values and
+    rebuilt with ``from_db``, so once it is cached a logged-in request
+    does not query ``auth_user`` to find out who is asking. The password
+    hash is part of the record because the session auth hash is derived
+    from it. Any save or delete of the user drops the record.
+    """
+
+    def get_user(self, user_id):
+        fields = _fields()
+        key = user_key(user_id)
+        record = cache.get(key)
+        if record is None:
+            record = User._default_manager.filter(
+                pk=user_id
+            ).values_list(*fields).first() or ()
+            cache.set(key, record, USER_CACHE_TIMEOUT)
+        if not record:
+            return None
+        user = User.from_db(router.db_for_read(User), fields, record)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    cache.delete(user_key(instance.pk))
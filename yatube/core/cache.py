@@ -0,0 +1,247 @@
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.files import locks
+
+# локальный уровень общий для всех потоков процесса: обработчик caches
+# создаёт по экземпляру бэкенда на поток, как и у LocMemCache
+_locals = {}
+_locks = {}
+_MISSING = object()
+# на столько файлов раскладываются блокировки add/incr/touch по ключам
+LOCK_STRIPES = 64
+
+
+class TwoTierCache(BaseCache):
+    """Bounded per-process LRU in front of a cache shared by all workers.
+
+    LOCATION is the alias of the shared cache in ``settings.CACHES``.
+    Every write stores the value together with a fresh version stamp and
+    also stores the stamp alone under a small side key. A local entry is
+    trusted for ``CHECK_INTERVAL`` seconds; after that only the stamp is
+    re-read from the shared tier, so a write or delete made by any worker
+    evicts the hot copy in all the others without moving the value again.
+
+    The shared record also keeps its expiry time, so ``incr`` and ``decr``
+    rewrite the value without resetting its timeout. ``add``, ``incr``,
+    ``decr`` and ``touch`` hold a file lock in ``LOCK_DIR``, so they are
+    atomic across threads and processes even when the shared backend's own
+    ``add`` is not.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._check_interval = float(options.get('CHECK_INTERVAL', 1))
+        self._local_timeout = float(options.get('LOCAL_TIMEOUT', 60))
+        self._lock_dir = options.get('LOCK_DIR') or os.path.join(
+            tempfile.gettempdir(), f'twotier-locks-{location}'
+        )
+        os.makedirs(self._lock_dir, exist_ok=True)
+        self._local = _locals.setdefault(location, OrderedDict())
+        self._lock = _locks.setdefault(location, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    @staticmethod
+    def _stamp_key(key):
+        return f'{key}:stamp'
+
+    @staticmethod
+    def _new_stamp():
+        return uuid.uuid4().hex[:16]
+
+    @contextmanager
+    def _locked(self, key, version):
+        stripe = zlib.crc32(self.make_key(key, version).encode())
+        path = os.path.join(
+            self._lock_dir, f'{stripe % LOCK_STRIPES}.lock'
+        )
+        with open(path, 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def _local_expiry(self, expiry):
+        limit = time.time() + self._local_timeout
+        if expiry is None:
+            return limit
+        return min(expiry, limit)
+
+    def _remember(self, local_key, stamp, value, expiry):
+        with self._lock:
+            self._local[local_key] = [stamp, value, expiry, time.time()]
+            self._local.move_to_end(local_key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _forget(self, local_key):
+        with self._lock:
+            self._local.pop(local_key, None)
+
+    def _lookup_local(self, local_key):
+        """Return ``(entry, fresh)`` for a live local entry or ``(None, _)``.
+
+        ``fresh`` is False when the stamp has to be re-checked.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return None, False
+            if entry[2] <= now:
+                del self._local[local_key]
+                return None, False
+            self._local.move_to_end(local_key)
+            return entry, now - entry[3] < self._check_interval
+
+    def _touch_checked(self, local_key):
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is not None:
+                entry[3] = time.time()
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        to_check = {}
+        for key in keys:
+            local_key = self.make_key(key, version=version)
+            self.validate_key(local_key)
+            entry, fresh = self._lookup_local(local_key)
+            if entry is None:
+                continue
+            if fresh:
+                found[key] = entry[1]
+            else:
+                to_check[key] = entry
+        if to_check:
+            stamps = self.shared.get_many(
+                [self._stamp_key(key) for key in to_check], version=version
+            )
+            for key, entry in to_check.items():
+                local_key = self.make_key(key, version=version)
+                if stamps.get(self._stamp_key(key)) == entry[0]:
+                    self._touch_checked(local_key)
+                    found[key] = entry[1]
+                else:
+                    self._forget(local_key)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            stored = self.shared.get_many(missing, version=version)
+            for key, record in stored.items():
+                stamp, value, expiry = record
+                self._remember(
+                    self.make_key(key, version=version), stamp, value,
+                    self._local_expiry(expiry)
+                )
+                found[key] = value
+        return found
+
+    @staticmethod
+    def _remaining(expiry):
+        if expiry is None:
+            return None
+        return max(1, math.ceil(expiry - time.time()))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        stamp = self._new_stamp()
+        expiry = self.get_backend_timeout(timeout)
+        self.shared.set_many(
+            {key: (stamp, value, expiry), self._stamp_key(key): stamp},
+            timeout=timeout, version=version
+        )
+        self._remember(local_key, stamp, value, self._local_expiry(expiry))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        stamp = self._new_stamp()
+        expiry = self.get_backend_timeout(timeout)
+        with self._locked(key, version):
+            if not self.shared.add(
+                key, (stamp, value, expiry), timeout, version
+            ):
+                return False
+            self.shared.set(self._stamp_key(key), stamp, timeout, version)
+        self._remember(local_key, stamp, value, self._local_expiry(expiry))
+        return True
+
+    def _update(self, key, version, change):
+        """Rewrite the shared record under a lock, keeping the stamp fresh.
+
+        ``change(value, expiry)`` returns the new value and timeout. Returns
+        the new value, or ``_MISSING`` when there is no record.
+        """
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        with self._locked(key, version):
+            record = self.shared.get(key, version=version)
+            if record is None:
+                return _MISSING
+            _, value, expiry = record
+            value, timeout = change(value, expiry)
+            stamp = self._new_stamp()
+            self.shared.set_many(
+                {
+                    key: (stamp, value, self.get_backend_timeout(timeout)),
+                    self._stamp_key(key): stamp,
+                },
+                timeout=timeout, version=version
+            )
+        self._forget(local_key)
+        return value
+
+    def incr(self, key, delta=1, version=None):
+        value = self._update(
+            key, version,
+            lambda value, expiry: (value + delta, self._remaining(expiry))
+        )
+        if value is _MISSING:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._update(
+            key, version, lambda value, expiry: (value, timeout)
+        ) is not _MISSING
+
+    def delete(self, key, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        self._forget(local_key)
+        self.shared.delete(self._stamp_key(key), version)
+        return bool(self.shared.delete(key, version))
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(self.make_key(key, version=version))
+        self.shared.delete_many(
+            [*keys, *(self._stamp_key(key) for key in keys)], version
+        )
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
@@ -0,0 +1,101 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from core.staticfiles import accepts_encoding, brotli
+
+COMPRESSED_CONTENT_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'image/svg+xml',
+)
+
+
+def _encodings():
+    if brotli is not None:
+        yield 'br'
+    yield 'gzip'
+
+
+def _compressor(coding):
+    """``(compress, flush, finish)`` callables of a streaming compressor."""
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(
+        settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def compress(coding, content):
+    compress_chunk, _, finish = _compressor(coding)
+    return compress_chunk(content) + finish()
+
+
+def compress_stream(coding, chunks):
+    """Compress every chunk as it comes and flush it right away, so the
+    client can start rendering before the page is finished.
+    """
+    compress_chunk, flush, finish = _compressor(coding)
+    for chunk in chunks:
+        data = compress_chunk(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """Compress text responses with brotli or gzip.
+
+    Unlike ``GZipMiddleware`` it skips bodies under COMPRESS_MIN_LENGTH,
+    uses a level meant for on-the-fly compression and flushes streamed
+    responses chunk by chunk. Anything that might be compressed varies on
+    Accept-Encoding, whichever encoding this client asked for.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        coding = next((
+            coding for coding in _encodings()
+            if accepts_encoding(accept_encoding, coding)
+        ), None)
+        if coding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                coding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+    @staticmethod
+    def _is_compressible(response):
+        content_type = response.get('Content-Type', '')
+        if (response.has_header('Content-Encoding')
+                or not content_type.startswith(COMPRESSED_CONTENT_TYPES)):
+            return False
+        return (
+            response.streaming
+            or len(response.content) >= settings.COMPRESS_MIN_LENGTH
+        )
@@ -0,0 +1,123 @@
+import codecs
+import functools
+import hashlib
+import json
+import re
+from urllib.parse import quote, unquote
+
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+
+HOLE_RE = re.compile(r'<!--hole:(\w+)((?: [^\s-]+)*)-->')
+FILLED_CONTENT_TYPES = ('text/html', 'application/json')
+
+_fillers = {}
+
+
+def filler(name):
+    """Register ``func(request, *args)`` that renders the hole ``name``."""
+    def decorator(func):
+        _fillers[name] = func
+        return func
+    return decorator
+
+
+def marker(name, *args):
+    """Placeholder that ``HoleFillingMiddleware`` replaces per request.
+
+    Arguments are quoted so a ``-->`` can never appear inside them.
+    """
+    quoted = ''.join(
+        ' ' + quote(str(arg), safe='').replace('-', '%2D') for arg in args
+    )
+    return f'<!--hole:{name}{quoted}-->'
+
+
+@functools.lru_cache(maxsize=None)
+def template_fingerprint(name):
+    """Short hash of the template's source for hole cache keys.
+
+    A deploy that changes the template changes the keys, so the shared
+    cache never serves a hole rendered from the old version.
+    """
+    source = get_template(name).template.source
+    return hashlib.md5(source.encode()).hexdigest()[:8]
+
+
+def cached_fill(key, render, timeout=None):
+    """Cache the rendered hole under ``key`` for ``timeout`` seconds.
+
+    ``None`` keeps it until deleted; use it only for keys a signal drops.
+    """
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, timeout)
+    return html
+
+
+def fill(request, content, escape=None):
+    """Replace every hole in ``content`` with its per-request HTML."""
+    def replace(match):
+        name, args = match.group(1), match.group(2).split()
+        html = _fillers[name](request, *(unquote(arg) for arg in args))
+        return escape(html) if escape else html
+    return HOLE_RE.sub(replace, content)
+
+
+def fill_stream(request, chunks, charset, escape=None):
+    """``fill`` for streamed bodies; a marker split between two chunks is
+    held back until its end arrives.
+    """
+    decoder = codecs.getincrementaldecoder(charset)()
+    pending = ''
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        start = pending.rfind('<')
+        if start != -1 and '>' not in pending[start:]:
+            ready, pending = pending[:start], pending[start:]
+        else:
+            ready, pending = pending, ''
+        if ready:
+            yield fill(request, ready, escape).encode(charset)
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield fill(request, pending, escape).encode(charset)
+
+
+def _json_escape(html):
+    return json.dumps(html)[1:-1]
+
+
+class HoleFillingMiddleware:
+    """Fill per-user holes in shared page skeletons.
+
+    Pages are rendered and cached without anything user-specific in them;
+    the username in the menu, the follow button and the author's buttons
+    are left as ``{% hole %}`` markers and are filled in here, after the
+    page cache, on every response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '')
+        if (response.has_header('Content-Encoding')
+                or not content_type.startswith(FILLED_CONTENT_TYPES)):
+            return response
+        escape = _json_escape if 'json' in content_type else None
+        if response.streaming:
+            response.streaming_content = fill_stream(
+                request, response.streaming_content, response.charset, escape
+            )
+        else:
+            content = response.content.decode(response.charset)
+            if '<!--hole:' not in content:
+                return response
+            response.content = fill(request, content, escape)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        return response
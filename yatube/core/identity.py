@@ -0,0 +1,141 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('identity_map', default=None)
+
+
+class IdentityMap:
+    """One instance per primary key and model for the current request.
+
+    ``fetched`` counts queries made through the map, ``saved`` counts the
+    lookups that would each have been a query without it.
+    """
+
+    def __init__(self):
+        self._objects = defaultdict(dict)
+        self.fetched = 0
+        self.saved = 0
+
+    def add(self, instance):
+        """Register an already loaded instance and return the canonical one.
+        """
+        known = self._objects[type(instance)]
+        return known.setdefault(instance.pk, instance)
+
+    def get(self, model, pk):
+        known = self._objects[model]
+        if pk in known:
+            self.saved += 1
+            return known[pk]
+        self.fetched += 1
+        instance = model._base_manager.get(pk=pk)
+        known[pk] = instance
+        return instance
+
+    def attach(self, objects, *fields):
+        """Fill the foreign keys ``fields`` of ``objects`` from the map.
+
+        Instances missing from the map are loaded with one query per field.
+        Returns ``objects`` as a list.
+        """
+        objects = list(objects)
+        for name in fields:
+            pending = defaultdict(list)
+            field = None
+            for obj in objects:
+                field = obj._meta.get_field(name)
+                if field.is_cached(obj):
+                    related = field.get_cached_value(obj)
+                    if related is not None:
+                        field.set_cached_value(obj, self.add(related))
+                    continue
+                pk = getattr(obj, field.attname)
+                if pk is not None:
+                    pending[pk].append(obj)
+            if not pending:
+                continue
+            model = field.related_model
+            known = self._objects[model]
+            missing = [pk for pk in pending if pk not in known]
+            if missing:
+                self.fetched += 1
+                known.update(model._base_manager.in_bulk(missing))
+            lookups = sum(len(objs) for objs in pending.values())
+            self.saved += lookups - (1 if missing else 0)
+            for pk, objs in pending.items():
+                instance = known.get(pk)
+                for obj in objs:
+                    field.set_cached_value(obj, instance)
+        return objects
+
+
+def current():
+    """Identity map of the current request, or a fresh one outside it."""
+    identity_map = _current.get()
+    return identity_map if identity_map is not None else IdentityMap()
+
+
+@contextmanager
+def use(identity_map):
+    """Make ``identity_map`` the current one inside the block."""
+    token = _current.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current.reset(token)
+
+
+class IdentityMapMiddleware:
+    """Give every request its own identity map and report what it saved.
+
+    With IDENTITY_MAP_HEADER on, the numbers also go to the
+    ``X-Identity-Map`` header; streamed pages are then rendered whole
+    before they are sent, since their numbers are only known at the end.
+    Otherwise streamed responses keep using the map while they render and
+    are logged once the stream is done.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # core.streaming сам импортирует этот модуль
+        from core.streaming import StreamedResponse
+
+        with use(IdentityMap()) as identity_map:
+            response = self.get_response(request)
+        header = getattr(settings, 'IDENTITY_MAP_HEADER', settings.DEBUG)
+        if header and isinstance(response, StreamedResponse):
+            # отладочный заголовок важнее потоковой отдачи
+            response.content
+        # файл отдаёт сервер через sendfile: обёртка лишила бы его этого
+        elif (response.streaming
+                and getattr(response, 'file_to_stream', None) is None):
+            response.streaming_content = self._report_after(
+                request, identity_map, response.streaming_content
+            )
+            return response
+        report = self._report(request, identity_map)
+        if header:
+            response['X-Identity-Map'] = report
+        return response
+
+    @staticmethod
+    def _report(request, identity_map):
+        report = (
+            f'fetched={identity_map.fetched}; saved={identity_map.saved}'
+        )
+        logger.debug('%s %s identity map: %s',
+                     request.method, request.path, report)
+        return report
+
+    @classmethod
+    def _report_after(cls, request, identity_map, chunks):
+        yield from chunks
+        cls._report(request, identity_map)
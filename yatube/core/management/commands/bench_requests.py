@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core import warmup
+
+# страницы без запросов к базе: в замер попадают только middleware,
+# резолвер и шаблоны
+DEFAULT_PATHS = ['/about/author/', '/about/tech/']
+
+
+def _start_response(status, headers, exc_info=None):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request time of the active settings profile; run it '
+        'once per YATUBE_PROFILE to compare them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests per path after the first one'
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help=f'Path to request, may repeat (default: {DEFAULT_PATHS})'
+        )
+
+    def _request(self, handler, environ):
+        started = time.perf_counter()
+        response = handler(environ, _start_response)
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Profile {settings.PROFILE}: DEBUG={settings.DEBUG}, "
+            f"{len(settings.INSTALLED_APPS)} apps, "
+            f"{len(settings.MIDDLEWARE)} middleware"
+        )
+        started = time.perf_counter()
+        handler = WSGIHandler()
+        if settings.WARM_UP:
+            warmup.warm_up()
+        self.stdout.write(
+            f'Handler start: {(time.perf_counter() - started) * 1000:.1f} ms'
+        )
+        factory = RequestFactory(REMOTE_ADDR='127.0.0.1')
+        for path in options['paths'] or DEFAULT_PATHS:
+            environs = [
+                factory.get(path).environ
+                for _ in range(options['requests'] + 1)
+            ]
+            first = self._request(handler, environs[0])
+            timings = [
+                self._request(handler, environ) for environ in environs[1:]
+            ]
+            timings.sort()
+            self.stdout.write(
+                f'{path}: first {first * 1000:.1f} ms, '
+                f'median {statistics.median(timings) * 1000:.2f} ms, '
+                f'p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms'
+            )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from core import orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete unreferenced uploads, thumbnails and sorl KV entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=orphans.BATCH_SIZE
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Seconds to sleep between deleted batches'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=orphans.MIN_AGE,
+            help='Skip files modified less than this many seconds ago'
+        )
+
+    def handle(self, *args, **options):
+        report = orphans.collect(
+            dry_run=options['dry_run'], batch_size=options['batch_size'],
+            pause=options['pause'], min_age=options['min_age']
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(
+            f"{verb} originals: {report['originals']} "
+            f"({report['originals bytes']} bytes)"
+        )
+        self.stdout.write(
+            f"{verb} thumbnails: {report['thumbnails']} "
+            f"({report['thumbnails bytes']} bytes)"
+        )
+        self.stdout.write(f"{verb} KV entries: {report['kv entries']}")
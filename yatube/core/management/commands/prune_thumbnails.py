@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Evict least recently used thumbnails over the byte budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-bytes', type=int, default=None,
+            help='Budget in bytes, THUMBNAIL_CACHE_MAX_BYTES by default'
+        )
+
+    def handle(self, *args, **options):
+        removed, total = thumbnails.prune(options['max_bytes'])
+        self.stdout.write(
+            f'Thumbnails removed: {removed}, bytes left: {total}'
+        )
@@ -0,0 +1,166 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _media_path(name):
+    name = posixpath.normpath(name).lstrip('/')
+    if name.startswith('..') or name in ('', '.'):
+        raise Http404
+    path = os.path.join(settings.MEDIA_ROOT, *name.split('/'))
+    if not os.path.isfile(path):
+        raise Http404
+    return name, path
+
+
+def content_hash(path, stat):
+    """SHA-256 of the file, cached until its size or mtime changes."""
+    key = 'media.hash.{}.{}.{}'.format(
+        hashlib.md5(path.encode()).hexdigest(),
+        stat.st_mtime_ns, stat.st_size,
+    )
+    digest = cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        cache.set(key, digest, None)
+    return digest
+
+
+def _parse_range(header, size):
+    """``(start, end)`` of a single byte range, inclusive.
+
+    Returns None for a missing or multi-part range, which is answered
+    with the whole file, and raises ValueError for an unsatisfiable one.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class _RangeFile:
+    """File object that reads only ``length`` bytes from ``start``."""
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _offload(response, name, path):
+    """Let the front server send the body when one is configured."""
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT + name
+        )
+    elif settings.MEDIA_X_SENDFILE:
+        response['X-Sendfile'] = path
+    else:
+        return False
+    return True
+
+
+def _with_headers(response, headers):
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _file_response(path, size, content_type, byte_range):
+    f = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(f, content_type=content_type)
+    start, end = byte_range
+    length = end - start + 1
+    if end == size - 1:
+        # до конца файла: сдвигаем позицию, sendfile продолжит с неё
+        f.seek(start)
+        response = FileResponse(f, content_type=content_type, status=206)
+    else:
+        response = FileResponse(
+            _RangeFile(f, start, length), content_type=content_type,
+            status=206
+        )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    return response
+
+
+@require_safe
+def serve(request, name):
+    """Serve an uploaded file from MEDIA_ROOT.
+
+    ``FileResponse`` hands the open file to the server's
+    ``wsgi.file_wrapper``, which sends it with ``sendfile`` without
+    copying it through Python. Single byte ranges are answered with 206,
+    ETags come from the content hash and the response is cacheable for
+    MEDIA_CACHE_SECONDS. With MEDIA_ACCEL_REDIRECT or MEDIA_X_SENDFILE set,
+    the body is left to nginx or Apache and only the headers come from
+    here.
+    """
+    name, path = _media_path(name)
+    stat = os.stat(path)
+    etag = '"%s"' % content_hash(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'public, max-age={settings.MEDIA_CACHE_SECONDS}',
+        'Accept-Ranges': 'bytes',
+    }
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        return _with_headers(HttpResponse(status=304), headers)
+    content_type = (
+        mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    )
+    response = HttpResponse(content_type=content_type)
+    if _offload(response, name, path):
+        # nginx и Apache сами отвечают на Range и условные запросы
+        return _with_headers(response, headers)
+    byte_range = None
+    if request.META.get('HTTP_IF_RANGE', etag) == etag:
+        try:
+            byte_range = _parse_range(
+                request.META.get('HTTP_RANGE', ''), stat.st_size
+            )
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    response = _file_response(path, stat.st_size, content_type, byte_range)
+    return _with_headers(response, headers)
@@ -0,0 +1,10 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """Reference count of a content-addressed file shared by several rows."""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name} ({self.refs})'
@@ -0,0 +1,159 @@
+import os
+import posixpath
+import time
+from collections import Counter
+from itertools import islice
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.db import models
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as DbKVStore
+from sorl.thumbnail.models import KVStore
+
+from .models import StoredFile
+
+BATCH_SIZE = 200
+# свежий файл может ещё ждать сохранения своей строки в базе
+MIN_AGE = 60 * 60
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _files(storage, directory, min_age):
+    """``(name, size)`` of files under ``directory``, read lazily."""
+    root = storage.path('')
+    stack = [storage.path(directory)]
+    deadline = time.time() - min_age
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime <= deadline:
+                    name = os.path.relpath(entry.path, root)
+                    yield name.replace(os.sep, '/'), stat.st_size
+
+
+def _file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if (isinstance(field, models.FileField)
+                    and isinstance(field.upload_to, str)):
+                yield model, field
+
+
+def _delete_thumbnails(name, storage):
+    # sorl помнит миниатюры под ключом исходника вместе с его хранилищем,
+    # а строятся они и от поля модели, и от имени в хранилище по умолчанию
+    for source_storage in {storage, default_storage}:
+        default.kvstore.delete(
+            ImageFile(name, source_storage), delete_thumbnails=True
+        )
+
+
+def _originals(report, dry_run, batch_size, pause, min_age):
+    for model, field in _file_fields():
+        directory = posixpath.dirname(field.upload_to)
+        if not directory:
+            # файлы в корне MEDIA_ROOT не отличить от чужих, их не трогаем
+            continue
+        files = _files(field.storage, directory, min_age)
+        for batch in _batches(files, batch_size):
+            sizes = dict(batch)
+            referenced = set(model._base_manager.filter(
+                **{f'{field.attname}__in': sizes}
+            ).values_list(field.attname, flat=True))
+            orphans = [name for name in sizes if name not in referenced]
+            report['originals'] += len(orphans)
+            report['originals bytes'] += sum(sizes[name] for name in orphans)
+            if dry_run or not orphans:
+                continue
+            for name in orphans:
+                _delete_thumbnails(name, field.storage)
+                field.storage.delete(name)
+            StoredFile.objects.filter(name__in=orphans).delete()
+            time.sleep(pause)
+
+
+def _kv_images(batch_size):
+    """Image entries of sorl's key-value store, paged by key."""
+    prefix = add_prefix('', 'image')
+    last_key = ''
+    while True:
+        rows = list(KVStore.objects.filter(
+            key__startswith=prefix, key__gt=last_key
+        ).order_by('key').values_list('key', 'value')[:batch_size])
+        if not rows:
+            return
+        last_key = rows[-1][0]
+        yield [deserialize_image_file(value) for _, value in rows]
+
+
+def _stale_entries(report, dry_run, batch_size, pause):
+    for batch in _kv_images(batch_size):
+        stale = [image for image in batch if not image.exists()]
+        report['kv entries'] += len(stale)
+        if dry_run or not stale:
+            continue
+        for image in stale:
+            default.kvstore.delete(image, delete_thumbnails=True)
+        time.sleep(pause)
+
+
+def _thumbnails(report, dry_run, batch_size, pause, min_age):
+    storage = default.storage
+    directory = thumbnail_settings.THUMBNAIL_PREFIX.strip('/')
+    for batch in _batches(_files(storage, directory, min_age), batch_size):
+        keys = {
+            add_prefix(ImageFile(name, storage).key): (name, size)
+            for name, size in batch
+        }
+        registered = set(KVStore.objects.filter(
+            key__in=keys
+        ).values_list('key', flat=True))
+        orphans = [keys[key] for key in keys if key not in registered]
+        report['thumbnails'] += len(orphans)
+        report['thumbnails bytes'] += sum(size for _, size in orphans)
+        if dry_run or not orphans:
+            continue
+        for name, _ in orphans:
+            storage.delete(name)
+        time.sleep(pause)
+
+
+def collect(dry_run=False, batch_size=BATCH_SIZE, pause=0.0,
+            min_age=MIN_AGE):
+    """Delete media nothing refers to any more.
+
+    Walks the upload directories of every ``FileField`` and checks each
+    batch of files against its column, drops sorl key-value entries of
+    files that are gone and then thumbnails sorl no longer knows about.
+    Files and directories are read lazily, so memory stays bounded by
+    ``batch_size``; ``pause`` seconds between batches keep the disk and
+    the database free for requests. Returns a ``Counter`` report.
+    """
+    report = Counter()
+    _originals(report, dry_run, batch_size, pause, min_age)
+    if not isinstance(default.kvstore, DbKVStore):
+        # без таблицы sorl не понять, какие миниатюры ещё нужны
+        return report
+    _stale_entries(report, dry_run, batch_size, pause)
+    _thumbnails(report, dry_run, batch_size, pause, min_age)
+    return report
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+TAG_TIMEOUT = None
+SKIPPED_HEADERS = {'content-length', 'set-cookie', 'vary'}
+
+
+def _tag_key(tag):
+    return f'pagecache.tag.{tag}'
+
+
+def _tag_cache():
+    # метки тегов читаем мимо локального уровня TwoTierCache, чтобы сброс
+    # в одном воркере сразу был виден во всех остальных
+    return getattr(cache, 'shared', cache)
+
+
+def _page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagecache.page.{digest}'
+
+
+def add_tags(request, *tags):
+    """Mark the response to ``request`` as cacheable under ``tags``."""
+    request._page_cache_tags = getattr(request, '_page_cache_tags', ()) + tags
+
+
+def limit_max_age(request, seconds):
+    """Keep the cached page no longer than ``seconds``."""
+    current = getattr(request, '_page_cache_max_age', seconds)
+    request._page_cache_max_age = min(current, seconds)
+
+
+def purge(*tags):
+    """Invalidate every cached page rendered under any of ``tags``."""
+    now = time.time()
+    _tag_cache().set_many(
+        {_tag_key(tag): now for tag in tags}, TAG_TIMEOUT
+    )
+
+
+def _is_valid(entry):
+    purged = _tag_cache().get_many(
+        [_tag_key(tag) for tag in entry['tags']]
+    )
+    return len(purged) == len(entry['tags']) and all(
+        purged_at <= entry['rendered_at'] for purged_at in purged.values()
+    )
+
+
+def _build_response(entry):
+    response = HttpResponse(gzip.decompress(entry['body']), status=200)
+    for header, value in entry['headers']:
+        response[header] = value
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+class PageCacheMiddleware:
+    """Whole-response cache of shared page skeletons.
+
+    Views opt in with ``add_tags``; a page stays cached until one of its
+    tags is purged or PAGE_CACHE_SECONDS pass. Skeletons carry no per-user
+    content, ``HoleFillingMiddleware`` fills that in, so the same entry is
+    served to everyone. The session and the user are only loaded lazily,
+    which an anonymous hit never does, so it makes no database queries.
+    Bodies are stored gzipped; a streamed page is stored once its last
+    chunk has gone out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._is_cacheable_request(request):
+            return self.get_response(request)
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None and _is_valid(entry):
+            return _build_response(entry)
+        started = time.time()
+        response = self.get_response(request)
+        if self._is_cacheable_response(request, response):
+            self._store(request, response, key, started)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    @staticmethod
+    def _is_cacheable_request(request):
+        if request.method != 'GET':
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in settings.PAGE_CACHE_VIEWS
+
+    @staticmethod
+    def _is_cacheable_response(request, response):
+        return (
+            getattr(request, '_page_cache_tags', None)
+            and response.status_code == 200
+            and not response.cookies
+            and not response.has_header('Content-Encoding')
+        )
+
+    @classmethod
+    def _store(cls, request, response, key, started):
+        headers = [
+            (header, value) for header, value in response.items()
+            if header.lower() not in SKIPPED_HEADERS
+        ]
+        if not response.streaming:
+            cls._save(request, key, started, headers, response.content)
+            return
+
+        def tee(chunks):
+            body = []
+            for chunk in chunks:
+                body.append(chunk)
+                yield chunk
+            cls._save(request, key, started, headers, b''.join(body))
+        response.streaming_content = tee(response.streaming_content)
+
+    @staticmethod
+    def _save(request, key, started, headers, body):
+        tags = request._page_cache_tags
+        # Метка тега могла быть вытеснена: пересоздаём её временем начала
+        # рендера, чтобы более старые страницы с этим тегом не ожили.
+        for tag in tags:
+            _tag_cache().add(_tag_key(tag), started, TAG_TIMEOUT)
+        timeout = getattr(
+            request, '_page_cache_max_age', settings.PAGE_CACHE_SECONDS
+        )
+        cache.set(key, {
+            'body': gzip.compress(body, mtime=0),
+            'headers': headers,
+            'tags': tags,
+            'rendered_at': started,
+        }, max(int(min(timeout, settings.PAGE_CACHE_SECONDS)), 1))
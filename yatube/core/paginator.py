@@ -0,0 +1,147 @@
+import calendar
+import datetime as dt
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def _counted_at_key(key):
+    return f'{key}:at'
+
+
+def _store_count(key, count):
+    cache.set_many(
+        {key: count, _counted_at_key(key): time.time()},
+        settings.PAGINATOR_COUNT_TIMEOUT
+    )
+
+
+def _refresh_count(key, queryset):
+    try:
+        _store_count(key, queryset.count())
+    except Exception:
+        logger.exception('Failed to refresh count %s', key)
+    finally:
+        cache.delete(f'{key}:lock')
+        connections.close_all()
+
+
+def cached_count(key, queryset):
+    """Return the cached row count of ``queryset``.
+
+    The first request counts synchronously. Once the cached number is older
+    than ``PAGINATOR_COUNT_REFRESH`` seconds it is still returned, and one
+    background thread recounts it.
+    """
+    entry = cache.get_many([key, _counted_at_key(key)])
+    if len(entry) < 2:
+        count = queryset.count()
+        _store_count(key, count)
+        return count
+    count, counted_at = entry[key], entry[_counted_at_key(key)]
+    if time.time() - counted_at > settings.PAGINATOR_COUNT_REFRESH:
+        if cache.add(f'{key}:lock', True, settings.PAGINATOR_COUNT_REFRESH):
+            threading.Thread(
+                target=_refresh_count, args=(key, queryset.all()),
+                daemon=True
+            ).start()
+    return max(count, 0)
+
+
+def adjust_count(key, delta):
+    """Shift a cached count by ``delta`` without recounting.
+
+    A count that is not cached is left alone: the next ``cached_count``
+    counts it anyway.
+    """
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that takes the total from ``cached_count``."""
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return cached_count(self.count_key, self.object_list)
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator for lists whose total is already known, e.g. from a
+    rollup table, so it never runs ``COUNT``.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        return self.known_count
+
+
+def page_window(page, size=None):
+    """Page numbers to link to around ``page``.
+
+    Always includes the first and the last page; ``None`` marks a gap.
+    """
+    if size is None:
+        size = settings.PAGINATOR_WINDOW
+    last = page.paginator.num_pages
+    start = max(page.number - size, 1)
+    end = min(page.number + size, last)
+    window = list(range(start, end + 1))
+    if start > 1:
+        window[:0] = [1, None] if start > 2 else [1]
+    if end < last:
+        window += [None, last] if end < last - 1 else [last]
+    return window
+
+
+def keyset_cursor(obj, field='pub_date'):
+    """Opaque cursor pointing right after ``obj`` in a descending feed."""
+    value = getattr(obj, field)
+    micros = calendar.timegm(value.utctimetuple()) * 10 ** 6
+    return f'{micros + value.microsecond}_{obj.pk}'
+
+
+def _parse_cursor(cursor):
+    micros, _, pk = cursor.partition('_')
+    if not (micros.isdigit() and pk.isdigit()):
+        return None, None
+    seconds, micros = divmod(int(micros), 10 ** 6)
+    value = dt.datetime.fromtimestamp(seconds, tz=dt.timezone.utc)
+    return value.replace(microsecond=micros), int(pk)
+
+
+def keyset_slice(queryset, cursor, size, field='pub_date'):
+    """Next ``size`` objects after ``cursor`` and the cursor that follows.
+
+    The queryset is ordered by ``(-field, -pk)`` and filtered on that pair,
+    so deep pages cost the same as the first one, unlike ``OFFSET``.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    value, pk = _parse_cursor(cursor or '')
+    if value is not None:
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        )
+    objects = list(queryset[:size + 1])
+    if len(objects) > size:
+        return objects[:size], keyset_cursor(objects[size - 1], field)
+    return objects, None
@@ -0,0 +1,156 @@
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico',
+    '.ttf', '.otf', '.eot',
+)
+MIN_COMPRESS_SIZE = 256
+# Файлы с хешем в имени никогда не меняются; прочие браузер перепроверяет.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with gzip and brotli siblings.
+
+    ``collectstatic`` writes ``name.<hash>.ext`` plus ``.gz`` and, when the
+    ``brotli`` package is installed, ``.br`` next to every text file.
+    Files missing from the manifest (no ``collectstatic`` run yet, as in
+    development and tests) are linked under their plain names.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def accepts_encoding(accept_encoding, coding):
+    for part in accept_encoding.split(','):
+        token, _, params = part.partition(';')
+        if token.strip().lower() not in (coding, '*'):
+            continue
+        quality = params.strip().partition('=')[2] or '1'
+        try:
+            return float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def _read_chunks(filename, chunk_size=64 * 1024):
+    with open(filename, 'rb') as body:
+        yield from iter(lambda: body.read(chunk_size), b'')
+
+
+class StaticFilesMiddleware:
+    """WSGI middleware serving STATIC_ROOT without a separate web server.
+
+    Picks the ``.br`` or ``.gz`` sibling the client accepts, answers
+    conditional requests with 304 and marks fingerprinted files from the
+    manifest as immutable. Anything it cannot serve goes to the wrapped
+    application.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = os.path.abspath(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        self.immutable = self._load_hashed_names()
+
+    def _load_hashed_names(self):
+        manifest = os.path.join(
+            self.root, ManifestStaticFilesStorage.manifest_name
+        )
+        try:
+            with open(manifest) as manifest_file:
+                paths = json.load(manifest_file).get('paths', {})
+        except (OSError, ValueError):
+            return frozenset()
+        return frozenset(paths.values())
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (environ.get('REQUEST_METHOD') not in ('GET', 'HEAD')
+                or not path.startswith(self.prefix)):
+            return self.application(environ, start_response)
+        name = posixpath.normpath(unquote(path[len(self.prefix):]))
+        filename = os.path.join(self.root, *name.split('/'))
+        if name.startswith(('..', '/')) or not os.path.isfile(filename):
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, name, filename)
+
+    def serve(self, environ, start_response, name, filename):
+        content_type, _ = mimetypes.guess_type(filename)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+            ('Cache-Control', IMMUTABLE_CACHE_CONTROL
+             if name in self.immutable else MUTABLE_CACHE_CONTROL),
+        ]
+        accept_encoding = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for coding, suffix in ENCODINGS:
+            if (accepts_encoding(accept_encoding, coding)
+                    and os.path.isfile(filename + suffix)):
+                filename += suffix
+                headers.append(('Content-Encoding', coding))
+                break
+        stat = os.stat(filename)
+        etag = '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(open(filename, 'rb'))
+        return _read_chunks(filename)
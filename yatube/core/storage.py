@@ -0,0 +1,125 @@
+import hashlib
+import os
+import posixpath
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import StoredFile
+
+# столько удаление не трогает файл, заново отданный из _save: ссылку на
+# него берёт сохранение записи, а если оно не случилось, файл уберёт
+# collect_media
+REUSE_SECONDS = 60 * 60
+
+
+def _reused_key(name):
+    return f'storage.reused.{name}'
+
+
+@contextmanager
+def _locked(path):
+    """Hold a lock on an existing file; yield False if there is none."""
+    try:
+        existing = open(path, 'rb')
+    except FileNotFoundError:
+        yield False
+        return
+    with existing:
+        locks.lock(existing, locks.LOCK_EX)
+        try:
+            # пока ждали блокировку, файл могли удалить
+            yield os.path.exists(path)
+        finally:
+            locks.unlock(existing)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that names every file by the SHA-256 of its content.
+
+    ``posts/cat.jpg`` is stored as ``posts/ab/cd/abcd….jpg``, so the same
+    picture uploaded twice is written once and every row points to the
+    same file, and to the same thumbnails, which sorl names after the
+    source. Rows holding a name are counted with ``acquire`` and
+    ``release``; the file goes away with its last reference. Reusing a
+    file and deleting it lock the file itself, so a copy handed out again
+    before its row takes a reference is never deleted under it.
+    """
+
+    def content_name(self, name, content):
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        digest = sha.hexdigest()
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        with _locked(self.path(name)) as exists:
+            if exists:
+                # ссылки ещё нет: помечаем файл, чтобы удаление по
+                # последней ссылке, ждущее коммита, его не тронуло
+                cache.set(_reused_key(name), True, REUSE_SECONDS)
+                return name
+        # пишем во временный файл и подменяем: одновременная загрузка того
+        # же содержимого просто перезапишет файл таким же
+        partial = super()._save(name + '.part', content)
+        os.replace(self.path(partial), self.path(name))
+        return name
+
+
+def acquire(name):
+    stored = StoredFile.objects.filter(name=name)
+    if not stored.update(refs=F('refs') + 1):
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(name=name, refs=1)
+        except IntegrityError:
+            stored.update(refs=F('refs') + 1)
+    # теперь файл держит ссылка, пометка из _save больше не нужна
+    cache.delete(_reused_key(name))
+
+
+def release(name, storage):
+    """Drop a reference; delete the file once nothing points to it."""
+    stored = StoredFile.objects.filter(name=name)
+    stored.update(refs=F('refs') - 1)
+    deleted, _ = stored.filter(refs__lte=0).delete()
+    if not deleted:
+        return
+    transaction.on_commit(lambda: _delete_unreferenced(name, storage))
+
+
+def _delete_unreferenced(name, storage):
+    try:
+        path = storage.path(name)
+    except SuspiciousFileOperation:
+        # имя задано вручную и указывает за пределы MEDIA_ROOT: не наш файл
+        return
+    with _locked(path) as exists:
+        if not exists:
+            return
+        # тот же файл могли успеть загрузить заново, пока шла транзакция
+        if (cache.get(_reused_key(name))
+                or StoredFile.objects.filter(name=name, refs__gt=0).exists()):
+            return
+        # core.thumbnails строит миниатюры от имени в хранилище по
+        # умолчанию, под этим же ключом sorl помнит их список
+        delete_with_thumbnails(
+            ImageFile(name, default_storage), delete_file=False
+        )
+        storage.delete(name)
@@ -0,0 +1,108 @@
+import re
+
+from django.http import StreamingHttpResponse
+from django.shortcuts import render as render_page
+
+from core import identity
+
+STREAM_RE = re.compile(r'<!--stream:(\d+)-->')
+
+
+class StreamedResponse(StreamingHttpResponse):
+    """Streaming response that can still be read whole when needed.
+
+    ``content`` drains the stream, so middleware or tests that need the
+    full body get it; ``streaming_content`` then replays it in one chunk.
+    """
+
+    @property
+    def content(self):
+        if self._buffered is None:
+            self._buffered = b''.join(super().streaming_content)
+        return self._buffered
+
+    @property
+    def streaming_content(self):
+        if self._buffered is not None:
+            return iter([self._buffered])
+        return super().streaming_content
+
+    @streaming_content.setter
+    def streaming_content(self, value):
+        self._buffered = None
+        self._set_streaming_content(value)
+
+
+def defer(request, nodelist, context):
+    """Put a template block off until the response is streamed.
+
+    Returns the placeholder to render in its place, or None when the
+    current response is not streamed.
+    """
+    blocks = getattr(request, '_streamed_blocks', None)
+    if blocks is None:
+        return None
+    blocks.append((nodelist, context))
+    return f'<!--stream:{len(blocks) - 1}-->'
+
+
+def stream_nodelist(nodelist, context):
+    """Render ``nodelist`` in chunks, split where its nodes can stream.
+
+    Nodes with a ``stream(context)`` generator, like ``{% streamedfor %}``
+    and ``{% swrcache %}``, give their own chunks; the output of the other
+    nodes between them is sent together.
+    """
+    pending = []
+    for node in nodelist:
+        stream = getattr(node, 'stream', None)
+        if stream is None:
+            pending.append(str(node.render_annotated(context)))
+            continue
+        if pending:
+            yield ''.join(pending)
+            pending = []
+        yield from stream(context)
+    if pending:
+        yield ''.join(pending)
+
+
+def _chunks(parts, blocks, identity_map):
+    yield parts[0]
+    for index, text in zip(parts[1::2], parts[2::2]):
+        nodelist, context = blocks[int(index)]
+        chunks = stream_nodelist(nodelist, context)
+        while True:
+            # карта нужна на время рендера каждого куска, а не между ними
+            with identity.use(identity_map):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        yield text
+
+
+def render(request, template_name, context=None, **kwargs):
+    """``render`` that streams the ``{% streamed %}`` blocks of the page.
+
+    Everything outside those blocks is rendered up front, so the view's
+    context and headers are final; the blocks are rendered while the first
+    bytes are already on the wire, one chunk per post card where they loop
+    with ``{% streamedfor %}``.
+    """
+    request._streamed_blocks = []
+    try:
+        response = render_page(request, template_name, context, **kwargs)
+    finally:
+        blocks = request._streamed_blocks
+        del request._streamed_blocks
+    if not blocks:
+        return response
+    parts = STREAM_RE.split(response.content.decode(response.charset))
+    streamed = StreamedResponse(
+        _chunks(parts, blocks, identity.current()),
+        status=response.status_code,
+    )
+    for header, value in response.items():
+        streamed[header] = value
+    return streamed
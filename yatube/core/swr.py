@@ -0,0 +1,116 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+
+def _stale_seconds():
+    return getattr(settings, 'SWR_STALE_SECONDS', 300)
+
+
+def _lock_seconds():
+    return getattr(settings, 'SWR_LOCK_SECONDS', 10)
+
+
+def _should_refresh(delta, fresh_until, beta, now):
+    """Probabilistic early expiration (XFetch).
+
+    The closer we are to ``fresh_until`` and the longer the value took to
+    compute, the more likely a request is to volunteer for the refresh,
+    so hot keys are usually rebuilt before they actually expire.
+    """
+    if beta <= 0:
+        return now >= fresh_until
+    return now - delta * beta * math.log(random.random() or 1e-12) >= (
+        fresh_until
+    )
+
+
+def _store(key, value, started, ttl):
+    delta = time.time() - started
+    fresh_until = started + delta + ttl
+    cache.set(key, (value, delta, fresh_until), ttl + _stale_seconds())
+    return fresh_until
+
+
+def _lookup(key, beta):
+    """Return ``(entry, locked)``.
+
+    ``entry`` is the cached entry to serve, or None when this request has
+    to compute the value; ``locked`` tells whether it holds the refresh
+    lock and so should store what it computes.
+    """
+    entry = cache.get(key)
+    lock_key = f'{key}:lock'
+    if entry is not None:
+        _, delta, fresh_until = entry
+        if not _should_refresh(delta, fresh_until, beta, time.time()):
+            return entry, False
+        if not cache.add(lock_key, True, _lock_seconds()):
+            return entry, False
+        return None, True
+    if cache.add(lock_key, True, _lock_seconds()):
+        return None, True
+    # Кто-то уже строит значение с нуля: немного подождём его.
+    deadline = time.time() + _lock_seconds()
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry, False
+    return None, False
+
+
+def get_or_refresh(key, compute, ttl, beta=1.0):
+    """Return the cached value for ``key``, recomputing it as needed.
+
+    A value stays fresh for ``ttl`` seconds and may then be served stale
+    for ``SWR_STALE_SECONDS`` more. Only the request that wins the lock
+    recomputes it, every other concurrent request gets the stale copy.
+    """
+    return get_or_refresh_until(key, compute, ttl, beta)[0]
+
+
+def get_or_refresh_until(key, compute, ttl, beta=1.0):
+    """Like ``get_or_refresh`` but also return when the value goes stale."""
+    entry, locked = _lookup(key, beta)
+    if entry is not None:
+        return entry[0], entry[2]
+    if not locked:
+        return compute(), time.time()
+    try:
+        started = time.time()
+        value = compute()
+        return value, _store(key, value, started, ttl)
+    finally:
+        cache.delete(f'{key}:lock')
+
+
+def stream_or_refresh_until(key, chunks, ttl, beta=1.0):
+    """Generator form of ``get_or_refresh_until`` for rendered text.
+
+    ``chunks()`` returns an iterator of strings. A cached value comes out
+    in one piece; a recomputed one chunk by chunk as soon as each is
+    made, and is stored once the last chunk is out. The generator returns
+    when the value goes stale, so use it with ``yield from``.
+    """
+    entry, locked = _lookup(key, beta)
+    if entry is not None:
+        yield entry[0]
+        return entry[2]
+    try:
+        started = time.time()
+        parts = []
+        for chunk in chunks():
+            parts.append(chunk)
+            yield chunk
+        if not locked:
+            return time.time()
+        return _store(key, mark_safe(''.join(parts)), started, ttl)
+    finally:
+        # оборванный клиентом поток ничего не сохраняет
+        if locked:
+            cache.delete(f'{key}:lock')
@@ -0,0 +1,11 @@
+from django import template
+
+from core import identity
+
+register = template.Library()
+
+
+@register.filter
+def attach(objects, fields):
+    """``{% for post in page|attach:"author group" %}``"""
+    return identity.current().attach(objects, *fields.split())
@@ -0,0 +1,24 @@
+from django import template
+
+from core.paginator import keyset_cursor as _keyset_cursor
+from core.paginator import page_window as _page_window
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    return _page_window(page)
+
+
+@register.filter
+def keyset_cursor(obj):
+    if not obj:
+        return ''
+    return _keyset_cursor(obj)
+
+
+@register.filter
+def newest_pk(objects):
+    """Id of the newest of ``objects``, 0 when there are none."""
+    return max((obj.pk for obj in objects), default=0)
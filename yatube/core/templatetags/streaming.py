@@ -0,0 +1,78 @@
+from copy import copy
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.streaming import defer, stream_nodelist
+
+register = template.Library()
+
+
+class StreamedNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        # копия контекста: после рендера страницы его стек уже будет снят
+        placeholder = defer(
+            context.get('request'), self.nodelist, copy(context)
+        )
+        if placeholder is None:
+            return self.nodelist.render(context)
+        return placeholder
+
+
+@register.tag('streamed')
+def do_streamed(parser, token):
+    """Block rendered while the response streams, see ``core.streaming``.
+
+    Usage: ``{% streamed %}...{% endstreamed %}``.
+    """
+    nodelist = parser.parse(('endstreamed',))
+    parser.delete_first_token()
+    return StreamedNode(nodelist)
+
+
+class StreamedForNode(template.Node):
+    def __init__(self, loopvar, sequence, nodelist):
+        self.loopvar = loopvar
+        self.sequence = sequence
+        self.nodelist = nodelist
+
+    def stream(self, context):
+        items = list(self.sequence.resolve(context, ignore_failures=True)
+                     or [])
+        parentloop = context.get('forloop', {})
+        with context.push():
+            for index, item in enumerate(items):
+                context['forloop'] = {
+                    'counter0': index,
+                    'counter': index + 1,
+                    'revcounter': len(items) - index,
+                    'revcounter0': len(items) - index - 1,
+                    'first': index == 0,
+                    'last': index == len(items) - 1,
+                    'parentloop': parentloop,
+                }
+                context[self.loopvar] = item
+                yield ''.join(stream_nodelist(self.nodelist, context))
+
+    def render(self, context):
+        return mark_safe(''.join(self.stream(context)))
+
+
+@register.tag('streamedfor')
+def do_streamedfor(parser, token):
+    """``for`` loop that streams one chunk per item inside ``{% streamed %}``.
+
+    Usage: ``{% streamedfor post in page %}...{% endstreamedfor %}``.
+    """
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != 'in':
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' statements should use the format "
+            f"'{bits[0]} x in y'."
+        )
+    nodelist = parser.parse(('endstreamedfor',))
+    parser.delete_first_token()
+    return StreamedForNode(bits[1], parser.compile_filter(bits[3]), nodelist)
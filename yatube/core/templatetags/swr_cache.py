@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from django import template
+
+from core.pagecache import limit_max_age
+from core.streaming import stream_nodelist
+from core.swr import get_or_refresh_until, stream_or_refresh_until
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, ttl, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.ttl = ttl
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def _key(self, context):
+        vary_on = ':'.join(str(var.resolve(context)) for var in self.vary_on)
+        digest = hashlib.md5(vary_on.encode()).hexdigest()
+        return f'swr.{self.fragment_name}.{digest}'
+
+    @staticmethod
+    def _limit_page(context, fresh_until):
+        # Страница целиком не должна пережить свежесть своего фрагмента.
+        request = context.get('request')
+        if request is not None:
+            limit_max_age(request, fresh_until - time.time())
+
+    def render(self, context):
+        value, fresh_until = get_or_refresh_until(
+            self._key(context), lambda: self.nodelist.render(context),
+            int(self.ttl.resolve(context))
+        )
+        self._limit_page(context, fresh_until)
+        return value
+
+    def stream(self, context):
+        """Chunks of the fragment: the cached one whole, a rebuilt one as
+        its ``{% streamedfor %}`` cards are rendered.
+        """
+        fresh_until = yield from stream_or_refresh_until(
+            self._key(context),
+            lambda: stream_nodelist(self.nodelist, context),
+            int(self.ttl.resolve(context))
+        )
+        self._limit_page(context, fresh_until)
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """Fragment cache that serves stale content while one request refreshes.
+
+    Usage: ``{% swrcache ttl fragment_name [var1 var2 ...] %}``.
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
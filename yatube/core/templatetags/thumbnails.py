@@ -0,0 +1,11 @@
+from django import template
+
+from core.thumbnails import thumbnail_url as signed_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, geometry, format='JPEG'):
+    """``<img src="{% thumbnail_url post.image "960" %}">``"""
+    return signed_url(image, geometry, format)
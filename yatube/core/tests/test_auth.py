@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class CachedUserTest(TestCase):
+    """Logged-in requests find their user without the database."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_no_queries_for_session_user(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertContains(response, '@reader')
+
+    def test_saved_user_reloaded(self):
+        self.client.get(self.url)
+        self.user.first_name = 'Читатель'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Читатель')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
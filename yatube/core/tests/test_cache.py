@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import TwoTierCache
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'shared': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': directory,
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.shared = caches['shared']
+        self.params = {'OPTIONS': {
+            'MAX_ENTRIES': 2, 'CHECK_INTERVAL': 0,
+            'LOCK_DIR': f'{directory}/locks',
+        }}
+        for name in ('core.cache._locals', 'core.cache._locks'):
+            patcher = mock.patch.dict(name, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.worker_1 = TwoTierCache('shared', self.params)
+        self.worker_2 = self._other_process()
+
+    def _other_process(self):
+        with mock.patch.dict('core.cache._locals', clear=True), \
+                mock.patch.dict('core.cache._locks', clear=True):
+            return TwoTierCache('shared', self.params)
+
+    def _in_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_value_is_shared_between_workers(self):
+        """Value written by one worker is readable by another."""
+        self.worker_1.set('key', 'value')
+        self.assertEqual(self.worker_2.get('key'), 'value')
+
+    def test_write_invalidates_other_workers(self):
+        """Write in one worker replaces hot copies in the others."""
+        self.worker_1.set('key', 'old')
+        self.assertEqual(self.worker_2.get('key'), 'old')
+        self.worker_1.set('key', 'new')
+        self.assertEqual(self.worker_2.get('key'), 'new')
+
+    def test_delete_invalidates_other_workers(self):
+        """Delete in one worker evicts hot copies in the others."""
+        self.worker_1.set('key', 'value')
+        self.worker_2.get('key')
+        self.worker_1.delete('key')
+        self.assertIsNone(self.worker_2.get('key'))
+
+    def test_local_hit_reads_only_stamp(self):
+        """Local hit re-reads the stamp, not the value."""
+        self.worker_1.set('key', 'value')
+        with mock.patch.object(
+            self.shared, 'get_many', wraps=self.shared.get_many
+        ) as get_many:
+            self.assertEqual(self.worker_1.get('key'), 'value')
+        get_many.assert_called_once_with(['key:stamp'], version=None)
+
+    def test_local_tier_is_bounded(self):
+        """Local tier keeps at most MAX_ENTRIES entries."""
+        for key in ('a', 'b', 'c'):
+            self.worker_1.set(key, key)
+        self.assertEqual(list(self.worker_1._local), [
+            self.worker_1.make_key('b'), self.worker_1.make_key('c')
+        ])
+        self.assertEqual(self.worker_1.get('a'), 'a')
+
+    def test_threads_share_local_tier(self):
+        """Backend instances of one process share the local tier."""
+        self.worker_1.set('key', 'value')
+        thread_cache = TwoTierCache('shared', self.params)
+        with mock.patch.object(
+            self.shared, 'get_many', wraps=self.shared.get_many
+        ) as get_many:
+            self.assertEqual(thread_cache.get('key'), 'value')
+        get_many.assert_called_once_with(['key:stamp'], version=None)
+
+    def test_add_does_not_overwrite(self):
+        """Add keeps the existing value."""
+        self.worker_1.set('key', 'first')
+        self.assertFalse(self.worker_2.add('key', 'second'))
+        self.assertEqual(self.worker_2.get('key'), 'first')
+
+    def test_incr_keeps_timeout(self):
+        """Incr and decr keep the timeout the key was stored with."""
+        self.worker_1.add('hours', 1, 3 * 60 * 60)
+        self.worker_1.add('forever', 0, None)
+        self.worker_2.get('hours')
+        self.assertEqual(self.worker_1.incr('hours'), 2)
+        self.assertEqual(self.worker_1.incr('forever', 5), 5)
+        self.assertEqual(self.worker_1.decr('forever'), 4)
+        later = time.time() + 400
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(self.worker_2.get('hours'), 2)
+            self.assertEqual(self.worker_2.get('forever'), 4)
+        with mock.patch('time.time', return_value=later + 3 * 60 * 60):
+            self.assertIsNone(self.worker_2.get('hours'))
+
+    def test_incr_missing_key(self):
+        """Incr of a missing key raises ValueError like other backends."""
+        with self.assertRaises(ValueError):
+            self.worker_1.incr('missing')
+
+    def test_concurrent_incr_is_atomic(self):
+        """Concurrent incr from many threads loses no updates."""
+        self.worker_1.add('counter', 0, None)
+
+        def work():
+            worker = TwoTierCache('shared', self.params)
+            for _ in range(50):
+                worker.incr('counter')
+
+        self._in_threads(work)
+        self.assertEqual(self.worker_2.get('counter'), 400)
+
+    def test_concurrent_add_has_one_winner(self):
+        """Only one of the concurrent adds of a key succeeds."""
+        for attempt in range(10):
+            key = f'lock-{attempt}'
+            winners = []
+
+            def work():
+                if TwoTierCache('shared', self.params).add(key, True):
+                    winners.append(True)
+
+            self._in_threads(work)
+            self.assertEqual(len(winners), 1)
@@ -0,0 +1,84 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.compression import CompressionMiddleware
+from core.holes import fill_stream, filler, marker
+from posts.models import Post
+
+User = get_user_model()
+
+
+@filler('test_name')
+def name(request, value):
+    return f'<b>{value}</b>'
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    def get(self, body, **headers):
+        request = RequestFactory().get('/', **headers)
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body))
+        return middleware(request)
+
+    def test_large_pages_are_compressed(self):
+        """Pages over the threshold are gzipped and vary on encoding."""
+        body = b'<div class="card">post</div>' * 100
+        response = self.get(body, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), body)
+        response = self.get(body)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_pages_are_left_alone(self):
+        """Bodies under the threshold are not worth compressing."""
+        response = self.get(b'ok', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_holes_split_between_chunks(self):
+        """A marker cut by a chunk boundary is still filled."""
+        html = ('<p>' + marker('test_name', 'x') + '</p>').encode()
+        chunks = [html[:7], html[7:12], html[12:]]
+        filled = b''.join(fill_stream(None, iter(chunks), 'utf-8'))
+        self.assertEqual(filled, b'<p><b>x</b></p>')
+
+
+class StreamedPageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create(username='tester')
+        for i in range(3):
+            Post.objects.create(text=f'Запись {i}', author=author)
+
+    def test_feed_is_streamed_and_compressed(self):
+        """Feed cards are streamed, gzipped chunk by chunk, then cached."""
+        response = self.client.get(
+            reverse('index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(response.context['page']), 3)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        html = gzip.decompress(b''.join(chunks)).decode()
+        self.assertIn('Запись 2', html)
+        self.assertNotIn('<!--hole:', html)
+        self.assertNotIn('<!--stream:', html)
+        cached = self.client.get(reverse('index'))
+        self.assertEqual(cached['X-Page-Cache'], 'HIT')
+        self.assertEqual(cached.content.decode(), html)
+
+    @override_settings(IDENTITY_MAP_HEADER=False)
+    def test_cards_are_streamed_one_by_one(self):
+        """A rebuilt feed fragment is sent one post card per chunk."""
+        response = self.client.get(reverse('index'))
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        cards = [chunk.count('Запись ') for chunk in chunks]
+        self.assertEqual([count for count in cards if count], [1, 1, 1])
@@ -0,0 +1,43 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.holes import filler, fill, marker, template_fingerprint
+
+
+@filler('test_echo')
+def echo(request, *args):
+    return '|'.join(args)
+
+
+class HolesTest(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_marker_round_trip(self):
+        """Arguments survive quoting, including spaces and dashes."""
+        content = 'a ' + marker('test_echo', 1, 'user--', 'x y') + ' b'
+        self.assertEqual(
+            fill(self.request, content), 'a 1|user--|x y b'
+        )
+
+    def test_fill_with_escape(self):
+        """Filled HTML can be escaped for JSON bodies."""
+        content = marker('test_echo', '"')
+        self.assertEqual(
+            fill(self.request, content, escape=lambda html: html * 2), '""'
+        )
+
+    def test_fingerprint_follows_template_source(self):
+        """Hole cache keys change together with the template."""
+        fingerprints = []
+        for source in ('old menu', 'new menu'):
+            with override_settings(TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'OPTIONS': {'loaders': [(
+                    'django.template.loaders.locmem.Loader',
+                    {'menu.html': source}
+                )]},
+            }]):
+                template_fingerprint.cache_clear()
+                fingerprints.append(template_fingerprint('menu.html'))
+        template_fingerprint.cache_clear()
+        self.assertNotEqual(fingerprints[0], fingerprints[1])
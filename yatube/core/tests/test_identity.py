@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import FileResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.identity import IdentityMap, IdentityMapMiddleware
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class IdentityMapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Group', slug='group')
+        for i in range(3):
+            Post.objects.create(
+                text=f'post {i}', author=self.author, group=self.group
+            )
+
+    def test_attach_loads_each_model_once(self):
+        """Foreign keys are filled with one query per field."""
+        identity_map = IdentityMap()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(2):
+            identity_map.attach(posts, 'author', 'group')
+            authors = {id(post.author) for post in posts}
+            groups = {id(post.group) for post in posts}
+        self.assertEqual((len(authors), len(groups)), (1, 1))
+        self.assertEqual((identity_map.fetched, identity_map.saved), (2, 4))
+
+    def test_registered_instances_are_reused(self):
+        """Objects loaded by the view are handed out again."""
+        identity_map = IdentityMap()
+        identity_map.add(self.author)
+        post = Post.objects.first()
+        comments = [
+            Comment.objects.create(post=post, author=author, text='hi')
+            for author in (self.author, self.reader, self.author)
+        ]
+        comments = list(Comment.objects.filter(pk__in=[
+            comment.pk for comment in comments
+        ]))
+        with self.assertNumQueries(1):
+            identity_map.attach(comments, 'author')
+        self.assertIs(comments[0].author, self.author)
+        with self.assertNumQueries(0):
+            self.assertIs(identity_map.get(User, self.reader.pk),
+                          comments[1].author)
+
+    @override_settings(IDENTITY_MAP_HEADER=True)
+    def test_report_header(self):
+        """The saved fetches are reported on the response."""
+        response = self.client.get(f'/{self.author.username}/')
+        self.assertEqual(
+            response['X-Identity-Map'], 'fetched=1; saved=2'
+        )
+
+    def test_file_response_left_for_sendfile(self):
+        """File responses keep their file for ``wsgi.file_wrapper``."""
+        response = FileResponse(open(__file__, 'rb'))
+        self.addCleanup(response.close)
+        middleware = IdentityMapMiddleware(lambda request: response)
+        middleware(RequestFactory().get('/media/file'))
+        self.assertIsNotNone(response.file_to_stream)
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+DATA = bytes(range(256)) * 40
+
+
+class MediaServeTest(TestCase):
+    """Uploaded files are served with ranges, validators and offload."""
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'posts'))
+        with open(os.path.join(self.root, 'posts', 'cat.jpg'), 'wb') as f:
+            f.write(DATA)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.etag = '"%s"' % hashlib.sha256(DATA).hexdigest()
+
+    def get(self, name='posts/cat.jpg', **headers):
+        return self.client.get('/media/' + name, **headers)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), DATA)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(DATA)))
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_not_modified(self):
+        response = self.get(HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_ranges(self):
+        cases = {
+            'bytes=10-19': (10, 19), 'bytes=10000-': (10000, len(DATA) - 1),
+            'bytes=-6': (len(DATA) - 6, len(DATA) - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content), DATA[start:end + 1]
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{end}/{len(DATA)}'
+                )
+                self.assertEqual(
+                    response['Content-Length'], str(end - start + 1)
+                )
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(DATA)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(DATA)}')
+
+    def test_stale_if_range_gets_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), DATA)
+
+    def test_outside_media_root(self):
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+        self.assertEqual(self.get('posts/missing.jpg').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected/')
+    def test_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected/posts/cat.jpg'
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], self.etag)
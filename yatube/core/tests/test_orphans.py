@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core import orphans
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CollectOrphansTest(TestCase):
+    """Unreferenced uploads, thumbnails and KV entries are collected."""
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        author = User.objects.create(username='author')
+        self.post = Post(text='text', author=author)
+        self.post.image.save('cat.jpg', ContentFile(b'kept'))
+        self.orphan = self.write('posts/lost.jpg')
+        self.thumbnail = self.register(self.write('cache/ab/cd/kept.jpg'))
+        self.stray = self.write('cache/ef/01/stray.jpg')
+        self.register('cache/12/34/gone.jpg')
+
+    def write(self, name):
+        path = os.path.join(self.root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'12345')
+        return name
+
+    def register(self, name):
+        image = ImageFile(name, default.storage)
+        image.set_size((1, 1))
+        default.kvstore.set(image)
+        return name
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.root, *name.split('/')))
+
+    def test_dry_run_reports_only(self):
+        report = orphans.collect(dry_run=True, min_age=0)
+        self.assertEqual(report['originals'], 1)
+        self.assertEqual(report['originals bytes'], 5)
+        self.assertEqual(report['thumbnails'], 1)
+        self.assertEqual(report['kv entries'], 1)
+        self.assertTrue(self.exists(self.orphan))
+        self.assertTrue(self.exists(self.stray))
+
+    def test_collect(self):
+        out = StringIO()
+        call_command('collect_media', min_age=0, pause=0, stdout=out)
+        self.assertIn('Deleted originals: 1 (5 bytes)', out.getvalue())
+        self.assertFalse(self.exists(self.orphan))
+        self.assertFalse(self.exists(self.stray))
+        self.assertTrue(self.exists(self.post.image.name))
+        self.assertTrue(self.exists(self.thumbnail))
+        self.assertIsNone(default.kvstore.get(
+            ImageFile('cache/12/34/gone.jpg', default.storage)
+        ))
+
+    def test_recent_files_are_kept(self):
+        report = orphans.collect(dry_run=True)
+        self.assertEqual(report['originals'], 0)
+        self.assertEqual(report['thumbnails'], 0)
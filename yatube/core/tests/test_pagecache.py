@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test-slug',
+            description='тестовая группа ура-ура'
+        )
+        cls.author = User.objects.create(username='tester')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            group=cls.group,
+            author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.author.username}),
+            reverse('post', kwargs={
+                'username': self.author.username, 'post_id': self.post.pk
+            }),
+        )
+
+    def test_hit_skips_session_and_database(self):
+        """Second anonymous request is served without queries."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                # потоковая страница попадает в кеш, когда дочитана
+                first_content = first.content
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second['X-Page-Cache'], 'HIT')
+                self.assertEqual(first_content, second.content)
+
+    def test_hit_reads_tag_stamps_from_shared_cache(self):
+        """Hit reads tag stamps from the shared cache in one call."""
+        url = self.urls[0]
+        self.guest_client.get(url).content
+        shared = caches['shared']
+        with mock.patch.object(
+            shared, 'get_many', wraps=shared.get_many
+        ) as get_many:
+            response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        get_many.assert_any_call(['pagecache.tag.index'])
+
+    def test_logged_in_users_share_cached_skeleton(self):
+        """Logged in users get the shared page with their own holes."""
+        stranger = User.objects.create(username='stranger')
+        author_client = Client()
+        author_client.force_login(self.author)
+        stranger_client = Client()
+        stranger_client.force_login(stranger)
+        url = self.urls[0]
+        author_page = author_client.get(url)
+        author_page.content
+        stranger_page = stranger_client.get(url)
+        self.assertEqual(stranger_page['X-Page-Cache'], 'HIT')
+        self.assertContains(author_page, '@tester.')
+        self.assertContains(author_page, 'Редактировать')
+        self.assertContains(stranger_page, '@stranger.')
+        self.assertNotContains(stranger_page, 'Редактировать')
+        self.assertNotContains(stranger_page, '<!--hole:')
+
+    def test_writes_purge_pages(self):
+        """Post, comment and follow writes purge the pages they touch."""
+        writes = {
+            'post': lambda: Post.objects.create(
+                text='Новая запись', group=self.group, author=self.author
+            ),
+            'comment': lambda: Comment.objects.create(
+                text='Комментарий', post=self.post, author=self.author
+            ),
+            'follow': lambda: Follow.objects.create(
+                user=User.objects.create(username='follower'),
+                author=self.author
+            ),
+        }
+        purged = {
+            'post': self.urls,
+            'comment': self.urls,
+            'follow': self.urls[2:],
+        }
+        for write, urls in purged.items():
+            with self.subTest(write=write):
+                for url in self.urls:
+                    self.guest_client.get(url)
+                writes[write]()
+                for url in urls:
+                    response = self.guest_client.get(url)
+                    self.assertEqual(response['X-Page-Cache'], 'MISS', url)
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TestCase, override_settings
+
+from core.paginator import (CachedCountPaginator, adjust_count, cached_count,
+                            page_window)
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CachedCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='tester')
+        for i in range(3):
+            Post.objects.create(text=f'Текст {i}', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Second count is served without a query."""
+        cached_count('count.test', Post.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count('count.test', Post.objects.all()), 3)
+
+    @override_settings(PAGINATOR_COUNT_REFRESH=-1)
+    def test_stale_count_refreshed_in_background(self):
+        """Stale count is returned and recounted in a thread."""
+        cached_count('count.test', Post.objects.all())
+        with mock.patch('core.paginator.threading.Thread') as thread:
+            self.assertEqual(cached_count('count.test', Post.objects.all()), 3)
+        thread.return_value.start.assert_called_once()
+
+    def test_adjust_count(self):
+        """Adjusted count is served without a recount."""
+        adjust_count('count.test', 1)
+        cached_count('count.test', Post.objects.all())
+        adjust_count('count.test', -2)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count('count.test', Post.objects.all()), 1)
+
+    def test_paginator_uses_cached_count(self):
+        """Paginator takes its total from the cache."""
+        cache.set_many({'count.test': 25, 'count.test:at': 2 ** 40})
+        paginator = CachedCountPaginator(Post.objects.all(), 10, 'count.test')
+        self.assertEqual(paginator.num_pages, 3)
+
+
+class PageWindowTest(TestCase):
+    def window(self, number, pages, size=2):
+        page = Paginator(range(pages * 10), 10).page(number)
+        return page_window(page, size)
+
+    def test_small_paginator(self):
+        """All pages are listed when they fit the window."""
+        self.assertEqual(self.window(2, 3), [1, 2, 3])
+
+    def test_window_in_the_middle(self):
+        """Only neighbours plus the first and last page are listed."""
+        self.assertEqual(
+            self.window(50, 1000), [1, None, 48, 49, 50, 51, 52, None, 1000]
+        )
+
+    def test_window_at_the_edge(self):
+        """No gap is added next to an adjacent edge page."""
+        self.assertEqual(self.window(3, 1000), [1, 2, 3, 4, 5, None, 1000])
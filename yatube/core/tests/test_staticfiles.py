@@ -0,0 +1,75 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+
+CSS = b'body { color: black; }\n' * 50
+
+
+class StaticFilesTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        settings = override_settings(
+            STATIC_ROOT=self.root, STATICFILES_DIRS=[self.source],
+            INSTALLED_APPS=['django.contrib.staticfiles']
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    def get(self, name, **environ):
+        app = StaticFilesMiddleware(lambda environ, start: [b'app'])
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        body = b''.join(app(dict(environ, PATH_INFO='/static/' + name),
+                            start_response))
+        return response.get('status'), response.get('headers', {}), body
+
+    def test_collectstatic_fingerprints_and_compresses(self):
+        """Hashed names get a gzip sibling and are used by {% static %}."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        self.assertEqual(static('css/site.css'), '/static/' + self.hashed)
+        with open(os.path.join(self.root, self.hashed + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+
+    def test_negotiation_and_caching(self):
+        """Compressed copies are negotiated and hashed names are immutable."""
+        status, headers, body = self.get(
+            self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(gzip.decompress(body), CSS)
+        status, headers, body = self.get(self.hashed)
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, CSS)
+        status, _, body = self.get(
+            self.hashed, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual((status, body), ('304 Not Modified', b''))
+
+    def test_unknown_paths_reach_the_application(self):
+        """Missing files and path traversal fall through to Django."""
+        for name in ('css/missing.css', '../secret.txt'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name)[2], b'app')
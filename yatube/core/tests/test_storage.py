@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from core.models import StoredFile
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ContentAddressedStorageTest(TransactionTestCase):
+    """Identical uploads share one file that goes with its last post."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Post._meta.get_field('image').storage
+        self.author = User.objects.create(username='author')
+        cache.clear()
+
+    def create_post(self, upload_name, content=b'picture'):
+        post = Post(text='text', author=self.author)
+        post.image.save(upload_name, ContentFile(content))
+        return post
+
+    def refs(self, name):
+        stored = StoredFile.objects.filter(name=name).first()
+        return stored.refs if stored else 0
+
+    def test_identical_uploads_stored_once(self):
+        first = self.create_post('cat.JPG')
+        second = self.create_post('copy.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2'
+            r'[0-9a-f]{60}\.jpg$'
+        )
+        directory = os.path.dirname(self.storage.path(first.image.name))
+        self.assertEqual(os.listdir(directory), [
+            os.path.basename(first.image.name)
+        ])
+        self.assertEqual(self.refs(first.image.name), 2)
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post('cat.jpg')
+        second = self.create_post('copy.jpg')
+        name = first.image.name
+        first.delete()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.refs(name), 1)
+        second.delete()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replaced_image_released(self):
+        post = self.create_post('cat.jpg')
+        old_name = post.image.name
+        post.image.save('dog.jpg', ContentFile(b'another picture'))
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertEqual(self.refs(post.image.name), 1)
+
+    def test_reused_file_survives_pending_delete(self):
+        post = self.create_post('cat.jpg')
+        name = post.image.name
+        with transaction.atomic():
+            post.delete()
+            # ссылку на файл запись возьмёт только при сохранении
+            self.storage.save('posts/copy.jpg', ContentFile(b'picture'))
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
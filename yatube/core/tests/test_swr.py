@@ -0,0 +1,57 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.swr import get_or_refresh, stream_or_refresh_until
+
+
+class GetOrRefreshTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_fresh_value_is_cached(self):
+        """Fresh value is computed once."""
+        self.assertEqual(get_or_refresh('key', self.compute, 60), 'value 1')
+        self.assertEqual(get_or_refresh('key', self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_value_is_recomputed(self):
+        """Expired value is rebuilt by the lock holder."""
+        get_or_refresh('key', self.compute, 0, beta=0)
+        self.assertEqual(
+            get_or_refresh('key', self.compute, 0, beta=0), 'value 2'
+        )
+
+    def test_stale_value_served_while_locked(self):
+        """Stale value is served while another request holds the lock."""
+        get_or_refresh('key', self.compute, 0, beta=0)
+        cache.add('key:lock', True)
+        self.assertEqual(
+            get_or_refresh('key', self.compute, 0, beta=0), 'value 1'
+        )
+        self.assertEqual(self.calls, 1)
+
+    def test_early_refresh(self):
+        """Fresh value may be rebuilt early under XFetch."""
+        cache.set('key', ('cached', 1.0, time.time() + 60))
+        with mock.patch('core.swr.random.random', return_value=1e-300):
+            self.assertEqual(
+                get_or_refresh('key', self.compute, 60), 'value 1'
+            )
+        self.assertEqual(self.calls, 1)
+
+    def test_stream_stored_after_last_chunk(self):
+        """Streamed rebuild is stored only once it has been sent whole."""
+        stream = stream_or_refresh_until('key', lambda: iter(['a', 'b']), 60)
+        self.assertEqual(next(stream), 'a')
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(list(stream), ['b'])
+        self.assertEqual(get_or_refresh('key', self.compute, 60), 'ab')
+        self.assertEqual(self.calls, 0)
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import throttle
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(THROTTLE_RATES={'comment': '2/minute'})
+class ThrottleTest(TestCase):
+    """Token buckets limit writes per user and refill over time."""
+
+    def setUp(self):
+        cache.clear()
+        throttle.reset()
+        self.user = User.objects.create(username='writer')
+        self.post = Post.objects.create(text='text', author=self.user)
+        self.client.force_login(self.user)
+
+    def test_bucket_refills(self):
+        self.assertEqual(throttle.take('comment', 'a', now=0), 0)
+        self.assertEqual(throttle.take('comment', 'a', now=0), 0)
+        self.assertEqual(throttle.take('comment', 'a', now=0), 30)
+        self.assertEqual(throttle.take('comment', 'b', now=0), 0)
+        self.assertEqual(throttle.take('comment', 'a', now=30), 0)
+        self.assertEqual(throttle.take('unlimited', 'a', now=0), 0)
+
+    def test_full_buckets_are_dropped(self):
+        throttle.take('comment', 'a', now=0)
+        throttle.take('comment', 'b', now=50)
+        throttle.take('comment', 'c', now=throttle.SWEEP_INTERVAL)
+        self.assertEqual(sorted(throttle._buckets), [
+            'throttle.comment.b', 'throttle.comment.c'
+        ])
+
+    @override_settings(THROTTLE_CACHE='default')
+    def test_shared_bucket(self):
+        throttle.take('comment', 'a', now=0)
+        throttle.take('comment', 'a', now=0)
+        throttle.reset()
+        self.assertEqual(throttle.take('comment', 'a', now=0), 30)
+
+    def test_view_answers_429(self):
+        url = reverse('add_comment', args=[self.user.username, self.post.pk])
+        for _ in range(2):
+            self.client.post(url, {'text': 'comment'})
+        response = self.client.post(url, {'text': 'comment'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response['Retry-After'].isdigit())
+        self.assertEqual(Comment.objects.count(), 2)
+
+
+@override_settings(MAX_CONCURRENT_REQUESTS=1, RETRY_AFTER_SECONDS=7)
+class ConcurrencyLimitTest(TestCase):
+    """Requests over the in-flight limit are shed with 503."""
+
+    def test_sheds_until_response_closed(self):
+        middleware = throttle.ConcurrencyLimitMiddleware(
+            lambda request: HttpResponse('ok')
+        )
+        request = RequestFactory().get('/')
+        first = middleware(request)
+        shed = middleware(request)
+        self.assertEqual(shed.status_code, 503)
+        self.assertEqual(shed['Retry-After'], '7')
+        first.close()
+        self.assertEqual(middleware(request).status_code, 200)
@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import thumbnails
+
+
+def image_bytes(size=(120, 80)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ThumbnailTest(TestCase):
+    """Signed thumbnails are built once, served from disk and pruned."""
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'posts'))
+        with open(os.path.join(self.root, 'posts', 'cat.png'), 'wb') as f:
+            f.write(image_bytes())
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    # sorl-thumbnail 12.6 ресайзит через Image.ANTIALIAS, убранный в Pillow 10
+    @skipUnless(hasattr(Image, 'ANTIALIAS'), 'requires Pillow < 10')
+    def test_built_once_then_served_from_disk(self):
+        url = thumbnails.thumbnail_url('posts/cat.png', '40x40')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        image = Image.open(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(image.size, (40, 40))
+        with mock.patch.object(thumbnails, 'get_thumbnail') as build:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        build.assert_not_called()
+
+    def test_tampered_token(self):
+        url = thumbnails.thumbnail_url('posts/cat.png', '40x40')
+        self.assertEqual(self.client.get(url[:-3] + 'xx/').status_code, 404)
+        url = thumbnails.thumbnail_url('posts/missing.png', '40x40')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_prune_evicts_least_recently_used(self):
+        paths = []
+        for age, shard in enumerate(('ab', 'cd', 'ef')):
+            directory = os.path.join(self.root, 'cache', shard, shard)
+            os.makedirs(directory)
+            paths.append(os.path.join(directory, shard * 16 + '.jpg'))
+            with open(paths[-1], 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(paths[-1], (1000 - age, 1000))
+        removed, total = thumbnails.prune(250)
+        self.assertEqual(removed, 1)
+        self.assertEqual(total, 200)
+        self.assertFalse(os.path.exists(paths[2]))
+        self.assertTrue(os.path.exists(paths[0]))
+
+    @override_settings(THUMBNAIL_CACHE_MAX_BYTES=1000)
+    def test_prune_started_in_background(self):
+        path = os.path.join(self.root, 'cache', 'ab', 'cd', 'thumb.jpg')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(b'x' * 60)
+        with mock.patch.object(thumbnails.threading, 'Thread') as thread:
+            thumbnails._written('cache/ab/cd/thumb.jpg')
+            later = time.time() + 400
+            with mock.patch('time.time', return_value=later):
+                thumbnails._written('cache/ab/cd/thumb.jpg')
+        thread.assert_called_once_with(
+            target=thumbnails._prune_in_background, daemon=True
+        )
+        self.assertEqual(cache.get(thumbnails.WRITTEN_KEY), 0)
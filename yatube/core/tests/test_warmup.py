@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from core import warmup
+from yatube.settings import production
+
+
+class WarmUpTest(TestCase):
+    """Warm-up fills the cached template loader and the URL resolver."""
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(TEMPLATES=production.TEMPLATES)
+    def test_templates_compiled_before_first_request(self):
+        patterns, templates = warmup.warm_up()
+        self.assertGreater(patterns, 0)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('post_item.html', loader.get_template_cache)
+        self.assertIn('signup.html', loader.get_template_cache)
+        self.assertGreaterEqual(len(loader.get_template_cache), templates)
+
+    def test_bench_requests(self):
+        out = StringIO()
+        call_command(
+            'bench_requests', requests=3, paths=['/about/author/'], stdout=out
+        )
+        self.assertIn('/about/author/: first', out.getvalue())
@@ -0,0 +1,170 @@
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60}
+
+# полные корзины ничем не отличаются от отсутствующих, раз в
+# SWEEP_INTERVAL секунд их выбрасываем, чтобы словарь не рос без конца
+SWEEP_INTERVAL = 60
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+_next_sweep = 0
+
+
+def parse_rate(rate):
+    """``'10/minute'`` → ``(10, 60)``: burst and the period it refills in."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period.rstrip('s')]
+
+
+def _refill(bucket, capacity, period, now):
+    if bucket is None:
+        return capacity
+    tokens, updated = bucket[:2]
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def _sweep(now):
+    global _next_sweep
+    if now < _next_sweep:
+        return
+    _next_sweep = now + SWEEP_INTERVAL
+    full = [key for key, bucket in _buckets.items() if bucket[2] <= now]
+    for key in full:
+        del _buckets[key]
+
+
+def _take_local(key, capacity, period, now):
+    with _buckets_lock:
+        _sweep(now)
+        tokens = _refill(_buckets.get(key), capacity, period, now)
+        allowed = tokens >= 1
+        left = tokens - allowed
+        full_at = now + (capacity - left) * period / capacity
+        _buckets[key] = (left, now, full_at)
+    return allowed, tokens
+
+
+def _take_shared(cache, key, capacity, period, now):
+    # get и set не атомарны: одновременные запросы изредка получат лишний
+    # токен, зато корзина общая для всех воркеров
+    tokens = _refill(cache.get(key), capacity, period, now)
+    allowed = tokens >= 1
+    cache.set(key, (tokens - allowed, now), period)
+    return allowed, tokens
+
+
+def take(scope, ident, now=None):
+    """Spend a token of ``ident``'s bucket for ``scope``.
+
+    Returns 0 when the request may go on, otherwise the seconds until the
+    next token. Scopes missing from THROTTLE_RATES are not limited.
+    """
+    rate = settings.THROTTLE_RATES.get(scope)
+    if rate is None:
+        return 0
+    capacity, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    key = f'throttle.{scope}.{ident}'
+    if settings.THROTTLE_CACHE:
+        allowed, tokens = _take_shared(
+            caches[settings.THROTTLE_CACHE], key, capacity, period, now
+        )
+    else:
+        allowed, tokens = _take_local(key, capacity, period, now)
+    if allowed:
+        return 0
+    return math.ceil((1 - tokens) * period / capacity)
+
+
+def reset():
+    global _next_sweep
+    with _buckets_lock:
+        _buckets.clear()
+        _next_sweep = 0
+
+
+def _ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def _too_many(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.', status=429,
+        content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def throttle(scope, methods=('POST',), uploads=False):
+    """Limit a view to THROTTLE_RATES[scope] requests per user or IP.
+
+    Only ``methods`` are counted (all of them for None); with ``uploads``
+    only requests carrying files are. Over the limit the view answers
+    429 with Retry-After.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            counted = (
+                (methods is None or request.method in methods)
+                and (not uploads or request.FILES)
+            )
+            if counted:
+                retry_after = take(scope, _ident(request))
+                if retry_after:
+                    return _too_many(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ConcurrencyLimitMiddleware:
+    """Shed load with 503 once MAX_CONCURRENT_REQUESTS are in flight.
+
+    The limit is per process. A request holds its slot until the server
+    closes the response, so a streamed page counts until its last chunk
+    is sent; requests over the limit are refused at once with Retry-After
+    instead of queueing behind the SQLite writer.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.semaphore = threading.BoundedSemaphore(
+            settings.MAX_CONCURRENT_REQUESTS
+        )
+
+    def __call__(self, request):
+        if not self.semaphore.acquire(blocking=False):
+            response = HttpResponse(
+                'Сервер перегружен, попробуйте позже.', status=503,
+                content_type='text/plain; charset=utf-8'
+            )
+            response['Retry-After'] = str(settings.RETRY_AFTER_SECONDS)
+            return response
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        close = response.close
+
+        def close_and_release():
+            # сервер закрывает ответ, когда отправил его целиком
+            response.close = close
+            try:
+                close()
+            finally:
+                self.semaphore.release()
+        response.close = close_and_release
+        return response
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import media
+
+SALT = 'core.thumbnails'
+FORMATS = ('JPEG', 'PNG', 'WEBP')
+# те же параметры, с которыми тег {% thumbnail %} резал картинки постов
+OPTIONS = {'crop': 'center', 'upscale': True}
+LOCK_SECONDS = 30
+# время последнего обращения обновляем не чаще раза в час
+TOUCH_INTERVAL = 60 * 60
+WRITTEN_KEY = 'thumbnails.written'
+PRUNE_LOCK_KEY = 'thumbnails.prune:lock'
+# обход media/cache/ может идти долго; столько держим блокировку
+PRUNE_LOCK_SECONDS = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_url(image, geometry, format='JPEG'):
+    """Signed URL of the ``geometry`` thumbnail of ``image``."""
+    name = getattr(image, 'name', image)
+    token = signing.dumps([name, geometry, format], salt=SALT)
+    return reverse('thumbnail', args=[token])
+
+
+def _name_key(name, geometry, format):
+    digest = hashlib.md5(f'{name}|{geometry}|{format}'.encode()).hexdigest()
+    return f'thumbnails.name.{digest}'
+
+
+def _path(name):
+    return os.path.join(settings.MEDIA_ROOT, *name.split('/'))
+
+
+def _touch(path):
+    """Mark the file as recently used for ``prune``, keeping its mtime."""
+    try:
+        stat = os.stat(path)
+        if time.time() - stat.st_atime > TOUCH_INTERVAL:
+            os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except FileNotFoundError:
+        pass
+
+
+def _build(key, name, geometry, format):
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, LOCK_SECONDS):
+        # Эту миниатюру уже строит другой запрос: дождёмся его.
+        deadline = time.time() + LOCK_SECONDS
+        while time.time() < deadline:
+            time.sleep(0.05)
+            thumbnail = cache.get(key)
+            if thumbnail is not None:
+                return thumbnail
+    try:
+        thumbnail = get_thumbnail(name, geometry, format=format, **OPTIONS)
+        cache.set(key, thumbnail.name, None)
+    finally:
+        cache.delete(lock_key)
+    _written(thumbnail.name)
+    return thumbnail.name
+
+
+def _prune_in_background():
+    try:
+        prune()
+    except Exception:
+        logger.exception('Failed to prune thumbnails')
+    finally:
+        cache.delete(PRUNE_LOCK_KEY)
+        connections.close_all()
+
+
+def _written(name):
+    """Start a prune once roughly a tenth of the budget has been written.
+
+    The walk over the cache directory runs in a background thread, one at
+    a time, so the request that crosses the threshold is not held up.
+    """
+    try:
+        size = os.path.getsize(_path(name))
+    except FileNotFoundError:
+        return
+    cache.add(WRITTEN_KEY, 0, None)
+    try:
+        written = cache.incr(WRITTEN_KEY, size)
+    except ValueError:
+        return
+    if written < settings.THUMBNAIL_CACHE_MAX_BYTES // 10:
+        return
+    if cache.add(PRUNE_LOCK_KEY, True, PRUNE_LOCK_SECONDS):
+        # вычитаем учтённое, а не обнуляем: записи других запросов остаются
+        cache.decr(WRITTEN_KEY, written)
+        threading.Thread(target=_prune_in_background, daemon=True).start()
+
+
+def prune(max_bytes=None):
+    """Delete the least recently used thumbnails over the byte budget.
+
+    Returns the number of files removed and the bytes left in the cache.
+    """
+    if max_bytes is None:
+        max_bytes = settings.THUMBNAIL_CACHE_MAX_BYTES
+    root = _path(thumbnail_settings.THUMBNAIL_PREFIX.strip('/'))
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_atime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        name = os.path.relpath(path, settings.MEDIA_ROOT)
+        # иначе sorl будет считать миниатюру существующей и не пересоздаст
+        default.kvstore.delete(
+            ImageFile(name.replace(os.sep, '/'), default.storage),
+            delete_thumbnails=False
+        )
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed, total
+
+
+@require_safe
+def serve(request, token):
+    """Build the signed thumbnail on first request, then serve it.
+
+    Thumbnails live in sorl's sharded ``cache/xx/yy/`` directories and
+    are sent by ``media.serve``. One request per thumbnail builds it, the
+    others wait for it, and the directory is kept under
+    THUMBNAIL_CACHE_MAX_BYTES by evicting the least recently used files.
+    """
+    try:
+        name, geometry, format = signing.loads(token, salt=SALT)
+    except (signing.BadSignature, ValueError):
+        raise Http404
+    if format not in FORMATS or not default_storage.exists(name):
+        raise Http404
+    key = _name_key(name, geometry, format)
+    thumbnail = cache.get(key)
+    if thumbnail is None or not os.path.isfile(_path(thumbnail)):
+        thumbnail = _build(key, name, geometry, format)
+    _touch(_path(thumbnail))
+    return media.serve(request, thumbnail)
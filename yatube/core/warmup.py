@@ -0,0 +1,67 @@
+import os
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+from django.urls import URLResolver, get_resolver
+
+
+def _compile_patterns(resolver):
+    count = 0
+    for pattern in resolver.url_patterns:
+        # регулярное выражение маршрута компилируется при первом обращении
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+        else:
+            count += 1
+    return count
+
+
+def warm_up_urls():
+    """Import the URLconf, compile its patterns and build reverse maps."""
+    resolver = get_resolver(settings.ROOT_URLCONF)
+    resolver.reverse_dict
+    return _compile_patterns(resolver)
+
+
+def _template_names(directory):
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            if file_name.endswith(('.html', '.txt')):
+                path = os.path.join(root, file_name)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_up_templates():
+    """Compile every template into the cached loaders of the engines."""
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        # с явными loaders APP_DIRS выключен, и template_dirs не знает
+        # о папках приложений, хотя app_directories.Loader их читает
+        directories = (*engine.dirs, *get_app_template_dirs('templates'))
+        names = {
+            name for directory in directories
+            for name in _template_names(directory)
+        }
+        for name in sorted(names):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                # шаблоны приложений, которым нужны незагруженные теги
+                continue
+            count += 1
+    return count
+
+
+def warm_up():
+    """Do the first request's one-off work before the first request.
+
+    Returns how many URL patterns and templates were prepared. Templates
+    stay compiled only with the cached loader, so call this from the
+    production profile (``WARM_UP``).
+    """
+    return warm_up_urls(), warm_up_templates()
@@ -0,0 +1,91 @@
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MonthlyCount
+
+
+def month_of(moment):
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.year, moment.month
+
+
+def month_range(year, month):
+    """Start and end of the month, for a ``pub_date`` range scan."""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    if settings.USE_TZ:
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start, end
+
+
+def _feeds(post):
+    feeds = [('index', 0), ('author', post.author_id)]
+    if post.group_id is not None:
+        feeds.append(('group', post.group_id))
+    return feeds
+
+
+def _adjust(feed, object_id, year, month, delta):
+    counts = MonthlyCount.objects.filter(
+        feed=feed, object_id=object_id, year=year, month=month
+    )
+    if counts.update(posts=F('posts') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            MonthlyCount.objects.create(
+                feed=feed, object_id=object_id, year=year, month=month,
+                posts=delta
+            )
+    except IntegrityError:
+        counts.update(posts=F('posts') + delta)
+
+
+def post_added(post):
+    year, month = month_of(post.pub_date)
+    for feed, object_id in _feeds(post):
+        _adjust(feed, object_id, year, month, 1)
+
+
+def post_removed(post):
+    year, month = month_of(post.pub_date)
+    for feed, object_id in _feeds(post):
+        _adjust(feed, object_id, year, month, -1)
+
+
+def posts_removed(author_id, rows):
+    """Take many posts of one author out of the counts in one pass.
+
+    ``rows`` are ``(pub_date, group_id)`` pairs of the posts.
+    """
+    counts = Counter()
+    for pub_date, group_id in rows:
+        month = month_of(pub_date)
+        counts[('index', 0) + month] += 1
+        counts[('author', author_id) + month] += 1
+        if group_id is not None:
+            counts[('group', group_id) + month] += 1
+    for (feed, object_id, year, month), posts in counts.items():
+        _adjust(feed, object_id, year, month, -posts)
+
+
+def post_moved(post, old_group_id):
+    """Move the post between groups' counts after its group changed."""
+    year, month = month_of(post.pub_date)
+    if old_group_id is not None:
+        _adjust('group', old_group_id, year, month, -1)
+    if post.group_id is not None:
+        _adjust('group', post.group_id, year, month, 1)
+
+
+def months(feed, object_id=0):
+    """``(year, month, posts)`` of every month with posts, newest first."""
+    return list(MonthlyCount.objects.filter(
+        feed=feed, object_id=object_id, posts__gt=0
+    ).values_list('year', 'month', 'posts'))
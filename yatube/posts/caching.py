@@ -0,0 +1,188 @@
+from django.core.cache import cache
+from django.db import router
+from django.db.models import Max
+from django.http import Http404
+
+from core import identity, pagecache
+from core.paginator import adjust_count
+
+from . import follow_graph
+from .models import Group, Post, User
+
+FEED_HEAD_TIMEOUT = 60 * 60 * 24
+# Поднимаем версию при изменении состава записи: старые ключи просто
+# перестанут читаться и вытеснятся.
+LOOKUP_VERSION = 2
+LOOKUP_TIMEOUT = 60 * 60 * 24
+# промахи живут недолго: перебор случайных адресов не должен надолго
+# занимать кеш и вытеснять из него настоящие записи
+LOOKUP_MISS_TIMEOUT = 60
+USER_RECORD_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'is_active'
+)
+GROUP_RECORD_FIELDS = ('id', 'slug', 'title', 'description')
+
+
+def count_key(feed, pk=None):
+    if pk is None:
+        return f'count.{feed}'
+    return f'count.{feed}.{pk}'
+
+
+def head_key(feed, pk=None):
+    if pk is None:
+        return f'head.{feed}'
+    return f'head.{feed}.{pk}'
+
+
+def lookup_key(model, value):
+    return f'lookup.v{LOOKUP_VERSION}.{model._meta.model_name}.{value}'
+
+
+def _lookup_or_404(model, field, value, fields):
+    """Instance of ``model`` by a unique ``field``, built from the cache.
+
+    Only ``fields`` are cached, as a tuple; the rest stay deferred and are
+    loaded if something touches them. A miss is cached too, as an empty
+    record, for ``LOOKUP_MISS_TIMEOUT`` seconds, and is deleted by the
+    signals when the object appears.
+    """
+    # from_db ждёт значения в порядке полей модели
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in fields
+    ]
+    key = lookup_key(model, value)
+    record = cache.get(key)
+    if record is None:
+        record = model._base_manager.filter(
+            **{field: value}
+        ).values_list(*fields).first() or ()
+        cache.set(
+            key, record, LOOKUP_TIMEOUT if record else LOOKUP_MISS_TIMEOUT
+        )
+    if not record:
+        raise Http404(f'No {model._meta.object_name} matches the query.')
+    instance = model.from_db(router.db_for_read(model), fields, record)
+    return identity.current().add(instance)
+
+
+def user_or_404(username):
+    user = _lookup_or_404(User, 'username', username, USER_RECORD_FIELDS)
+    if not user.is_active:
+        # аккаунт удалён и ждёт purge_deleted
+        raise Http404('No User matches the query.')
+    return user
+
+
+def group_or_404(slug):
+    return _lookup_or_404(Group, 'slug', slug, GROUP_RECORD_FIELDS)
+
+
+def invalidate_lookups(model, *values):
+    cache.delete_many([
+        lookup_key(model, value) for value in set(values) if value
+    ])
+
+
+def adjust_post_counts(post, delta):
+    """Add ``post`` to the cached feed totals, or take it out of them.
+
+    Followers' feed totals are not touched: the paginator recounts them
+    in the background within ``PAGINATOR_COUNT_REFRESH`` seconds.
+    """
+    keys = [count_key('index'), count_key('author', post.author_id)]
+    if post.group_id is not None:
+        keys.append(count_key('group', post.group_id))
+    for key in keys:
+        adjust_count(key, delta)
+
+
+def move_post_count(post, old_group_id):
+    """Move ``post`` between the cached group totals."""
+    if old_group_id is not None:
+        adjust_count(count_key('group', old_group_id), -1)
+    if post.group_id is not None:
+        adjust_count(count_key('group', post.group_id), 1)
+
+
+def follows_changed(user_id, author_ids):
+    """Drop everything derived from ``user_id`` following ``author_ids``."""
+    cache.delete(count_key('follow', user_id))
+    follow_graph.invalidate(user_id, author_ids)
+    pagecache.purge(
+        f'author:{user_id}', *(f'author:{pk}' for pk in author_ids)
+    )
+
+
+def purge_post_pages(post, group_ids=()):
+    """Drop cached pages that show ``post`` or depend on it."""
+    tags = ['index', f'post:{post.pk}', f'author:{post.author_id}']
+    tags += [f'group:{pk}' for pk in {post.group_id, *group_ids}
+             if pk is not None]
+    pagecache.purge(*tags)
+
+
+def _post_head_keys(post, group_ids=()):
+    keys = [head_key('index'), head_key('author', post.author_id)]
+    keys += [head_key('group', pk) for pk in {post.group_id, *group_ids}
+             if pk is not None]
+    return keys
+
+
+def drop_feed_heads(post, group_ids=()):
+    """Forget the newest post id of every feed ``post`` belongs to.
+
+    The next poll recomputes it from the database: advancing the cached
+    value in place would be a read-modify-write, and two concurrent posts
+    could leave the head at the older one.
+    """
+    cache.delete_many(_post_head_keys(post, group_ids))
+
+
+def author_posts_removed(author_id, group_counts, post_ids):
+    """What ``adjust_post_counts``, ``drop_feed_heads`` and
+    ``purge_post_pages`` do per post, for many posts of one author at once.
+
+    ``group_counts`` maps a group id to the number of removed posts in it.
+    """
+    group_ids = {pk for pk in group_counts if pk is not None}
+    adjust_count(count_key('index'), -len(post_ids))
+    adjust_count(count_key('author', author_id), -len(post_ids))
+    for pk in group_ids:
+        adjust_count(count_key('group', pk), -group_counts[pk])
+    cache.delete_many(
+        [head_key('index'), head_key('author', author_id)]
+        + [head_key('group', pk) for pk in group_ids]
+    )
+    pagecache.purge(
+        'index', 'trending', f'author:{author_id}',
+        *(f'group:{pk}' for pk in group_ids),
+        *(f'post:{pk}' for pk in post_ids)
+    )
+
+
+def feed_head(key, queryset):
+    """Return the newest post id in a feed, 0 for an empty one."""
+    head = cache.get(key)
+    if head is None:
+        head = queryset.aggregate(head=Max('pk'))['head'] or 0
+        cache.set(key, head, FEED_HEAD_TIMEOUT)
+    return head
+
+
+def follow_feed_head(user_id):
+    """Newest post id among the authors ``user_id`` follows."""
+    authors = follow_graph.followees(user_id)
+    keys = {head_key('author', pk): pk for pk in authors}
+    heads = cache.get_many(keys)
+    missing = [pk for key, pk in keys.items() if key not in heads]
+    if missing:
+        found = dict.fromkeys(missing, 0)
+        found.update(Post.objects.filter(
+            author_id__in=missing
+        ).values_list('author_id').annotate(head=Max('pk')).order_by())
+        found = {head_key('author', pk): head for pk, head in found.items()}
+        cache.set_many(found, FEED_HEAD_TIMEOUT)
+        heads.update(found)
+    return max(heads.values(), default=0)
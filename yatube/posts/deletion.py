@@ -0,0 +1,110 @@
+import time
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q
+
+from core import pagecache
+
+from . import archive, caching
+from .models import (Comment, Follow, MonthlyCount, Post, Suggestion,
+                     UserDeletion)
+
+BATCH_SIZE = 100
+
+
+def forget(post):
+    """Take a visible post out of the counters, feed heads and pages."""
+    archive.post_removed(post)
+    caching.adjust_post_counts(post, -1)
+    caching.drop_feed_heads(post)
+    caching.purge_post_pages(post)
+    pagecache.purge('trending')
+
+
+def delete_post(post):
+    """Hide the post and its comments now; ``purge`` deletes them later."""
+    with transaction.atomic():
+        Post._base_manager.filter(pk=post.pk).update(deleted=True)
+        Comment._base_manager.filter(post=post).update(deleted=True)
+    forget(post)
+    post.deleted = True
+
+
+def delete_user(user):
+    """Deactivate the account and hide everything it wrote.
+
+    A few UPDATE statements replace the cascade; the rows, follows and
+    files go later, batch by batch, in ``purge``.
+    """
+    with transaction.atomic():
+        UserDeletion.objects.get_or_create(user=user)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        posts = Post._base_manager.filter(author=user, deleted=False)
+        rows = list(posts.values_list('pk', 'pub_date', 'group_id'))
+        posts.update(deleted=True)
+        comments = Comment._base_manager.filter(
+            Q(author=user) | Q(post__author=user), deleted=False
+        )
+        commented = set(comments.values_list('post_id', flat=True))
+        comments.update(deleted=True)
+    archive.posts_removed(
+        user.pk, [(pub_date, group_id) for _, pub_date, group_id in rows]
+    )
+    caching.author_posts_removed(
+        user.pk, Counter(group_id for _, _, group_id in rows),
+        [pk for pk, _, _ in rows]
+    )
+    pagecache.purge(*(f'post:{pk}' for pk in commented))
+
+
+def _delete_in_batches(queryset, batch_size, pause):
+    """Delete ``queryset`` ``batch_size`` rows per transaction."""
+    deleted = 0
+    model = queryset.model
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        time.sleep(pause)
+
+
+def _purge_user(user, batch_size, pause):
+    _delete_in_batches(
+        Follow.objects.filter(Q(user=user) | Q(author=user)),
+        batch_size, pause
+    )
+    _delete_in_batches(
+        Suggestion.objects.filter(Q(user=user) | Q(author=user)),
+        batch_size, pause
+    )
+    # остатки после posts_removed: строки с нулём постов
+    MonthlyCount.objects.filter(feed='author', object_id=user.pk).delete()
+    with transaction.atomic():
+        user.delete()
+
+
+def purge(batch_size=BATCH_SIZE, pause=0.0):
+    """Delete hidden comments, posts and accounts in small transactions.
+
+    Every batch commits on its own, so SQLite is never locked for longer
+    than one batch takes, and ``pause`` seconds between batches let
+    requests through. Counters and caches were already updated when the
+    content was hidden; deleting posts still releases their images.
+    Returns how many rows of each kind were deleted.
+    """
+    report = Counter()
+    report['comments'] = _delete_in_batches(
+        Comment._base_manager.filter(deleted=True), batch_size, pause
+    )
+    report['posts'] = _delete_in_batches(
+        Post._base_manager.filter(deleted=True), batch_size, pause
+    )
+    for deletion in UserDeletion.objects.select_related('user'):
+        _purge_user(deletion.user, batch_size, pause)
+        report['users'] += 1
+    return report
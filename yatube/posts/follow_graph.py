@@ -0,0 +1,67 @@
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Follow
+
+GRAPH_TIMEOUT = 60 * 60 * 24
+
+
+def _key(direction, user_id):
+    return f'graph.{direction}.{user_id}'
+
+
+def _load(direction, user_id):
+    """Sorted array of the ids on one side of ``user_id``'s follows.
+
+    Loaded on first use and kept in the cache, whose local tier holds the
+    hot ones in process memory, until a ``Follow`` signal drops it.
+    """
+    key = _key(direction, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        if direction == 'followees':
+            follows = Follow.objects.filter(user_id=user_id)
+            column = 'author_id'
+        else:
+            follows = Follow.objects.filter(author_id=user_id)
+            column = 'user_id'
+        ids = array('q', sorted(set(
+            follows.values_list(column, flat=True)
+        )))
+        cache.set(key, ids, GRAPH_TIMEOUT)
+    return ids
+
+
+def followees(user_id):
+    """Sorted ids of the authors ``user_id`` follows."""
+    return _load('followees', user_id)
+
+
+def followers(user_id):
+    """Sorted ids of the users following ``user_id``."""
+    return _load('followers', user_id)
+
+
+def _contains(ids, value):
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+def is_following(user_id, author_id):
+    return _contains(followees(user_id), author_id)
+
+
+def following_count(user_id):
+    return len(followees(user_id))
+
+
+def followers_count(user_id):
+    return len(followers(user_id))
+
+
+def invalidate(user_id, author_ids):
+    cache.delete_many([_key('followees', user_id)] + [
+        _key('followers', pk) for pk in author_ids
+    ])
@@ -0,0 +1,64 @@
+from django.db import transaction
+
+from . import caching
+from .models import Follow, User
+
+
+def _author_ids(user, authors):
+    """Ids of ``authors`` (users, ids or usernames) other than ``user``."""
+    ids, names = set(), set()
+    for author in authors:
+        if isinstance(author, User):
+            ids.add(author.pk)
+        elif isinstance(author, int):
+            ids.add(author)
+        else:
+            names.add(author)
+    if names:
+        ids.update(User.objects.filter(
+            username__in=names
+        ).values_list('pk', flat=True))
+    ids.discard(user.pk)
+    return sorted(ids)
+
+
+def follow(user, authors):
+    """Make ``user`` follow every one of ``authors`` in one transaction.
+
+    Existing follows are skipped by the unique constraint, so repeated
+    and concurrent calls are harmless. Returns the ids of the authors
+    followed by this call, not those followed already.
+    """
+    author_ids = _author_ids(user, authors)
+    if not author_ids:
+        return author_ids
+    follows = Follow.objects.filter(user=user, author_id__in=author_ids)
+    with transaction.atomic():
+        before = set(follows.values_list('author_id', flat=True))
+        Follow.objects.bulk_create([
+            Follow(user=user, author_id=pk)
+            for pk in author_ids if pk not in before
+        ], ignore_conflicts=True)
+        after = set(follows.values_list('author_id', flat=True))
+    # новыми считаем только строки, появившиеся внутри транзакции
+    author_ids = sorted(after - before)
+    if not author_ids:
+        return author_ids
+    # bulk_create не шлёт сигналов: сбрасываем кеши сами
+    caching.follows_changed(user.pk, author_ids)
+    return author_ids
+
+
+def unfollow(user, authors):
+    """Remove the follows of ``user`` on ``authors`` in one transaction.
+
+    Returns the number of follows removed.
+    """
+    author_ids = _author_ids(user, authors)
+    if not author_ids:
+        return 0
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).delete()
+    return deleted
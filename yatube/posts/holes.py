@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from core.holes import cached_fill, filler, template_fingerprint
+
+from . import follow_graph, suggestions, trending
+from .forms import CommentForm
+from .models import Suggestion
+
+SUGGESTIONS_TIMEOUT = 60 * 60 * 24
+# меню никто не сбрасывает, так что храним его конечное время
+MENU_TIMEOUT = 60 * 60 * 24
+
+
+def nav_key(user_id):
+    version = template_fingerprint('nav.html')
+    return f'hole.nav.{version}.{user_id or "anon"}'
+
+
+@filler('nav')
+def nav(request):
+    return cached_fill(
+        nav_key(request.user.pk),
+        lambda: render_to_string('nav.html', request=request)
+    )
+
+
+@filler('menu')
+def menu(request, active):
+    authenticated = request.user.is_authenticated
+    return cached_fill(
+        f'hole.menu.{template_fingerprint("menu.html")}'
+        f'.{int(authenticated)}.{active}',
+        lambda: render_to_string('menu.html', {
+            'index': active == 'index', 'follow': active == 'follow',
+            'trending': active == 'trending',
+        }, request),
+        MENU_TIMEOUT
+    )
+
+
+@filler('follow')
+def follow_button(request, author_id, username):
+    following = (
+        request.user.is_authenticated
+        and follow_graph.is_following(request.user.pk, int(author_id))
+    )
+    return render_to_string('follow_button.html', {
+        'following': following, 'username': username
+    })
+
+
+@filler('seen')
+def post_seen(request, post_id):
+    """Count a view of the post; filled on page cache hits too."""
+    trending.record_view(int(post_id))
+    return ''
+
+
+@filler('owner')
+def owner_buttons(request, post_id, author_id, username):
+    if request.user.pk != int(author_id):
+        return ''
+    return render_to_string('post_owner.html', {
+        'post_id': post_id, 'username': username
+    })
+
+
+@filler('comment_form')
+def comment_form(request, username, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string('comment_form.html', {
+        'form': CommentForm(), 'username': username, 'post_id': post_id
+    }, request)
+
+
+@filler('suggestions')
+def suggested_authors(request):
+    """Precomputed authors to follow, minus those followed since."""
+    user = request.user
+    if not user.is_authenticated:
+        return ''
+    key = f'hole.suggestions.{suggestions.generation()}.{user.pk}'
+    authors = cache.get(key)
+    if authors is None:
+        authors = list(Suggestion.objects.filter(user=user).values_list(
+            'author_id', 'author__username', 'score'
+        ))
+        cache.set(key, authors, SUGGESTIONS_TIMEOUT)
+    authors = [
+        (username, score) for author_id, username, score in authors
+        if not follow_graph.is_following(user.pk, author_id)
+    ]
+    if not authors:
+        return ''
+    return render_to_string('suggestions.html', {'authors': authors})
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Drop old activity buckets and rebuild the trending posts table'
+
+    def handle(self, *args, **options):
+        count = trending.compact()
+        self.stdout.write(f'Trending posts ranked: {count}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recompute suggested authors for every user from the follow graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=suggestions.TOP_N,
+            help='Authors stored per user.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows inserted per query.'
+        )
+
+    def handle(self, *args, **options):
+        count = suggestions.compute(options['top'], options['batch_size'])
+        self.stdout.write(f'Suggestions computed for {count} users')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Hide accounts and their content now; purge_deleted removes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='+', metavar='username',
+            help='Users to delete.'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username__in=options['usernames'])
+        missing = set(options['usernames']) - {user.username for user in users}
+        if missing:
+            raise CommandError(f'No users {sorted(missing)!r}')
+        for user in users:
+            deletion.delete_user(user)
+            self.stdout.write(f'{user}: hidden, waiting for purge_deleted')
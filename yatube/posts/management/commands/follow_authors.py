@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Follow or unfollow many authors on behalf of a user at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User who follows.')
+        parser.add_argument(
+            'authors', nargs='+', metavar='author',
+            help='Usernames of the authors.'
+        )
+        parser.add_argument(
+            '--unfollow', action='store_true',
+            help='Remove the follows instead of adding them.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user {options["username"]!r}')
+        if options['unfollow']:
+            count = follows.unfollow(user, options['authors'])
+            self.stdout.write(f'{user}: unfollowed {count}')
+        else:
+            count = len(follows.follow(user, options['authors']))
+            self.stdout.write(f'{user}: followed {count} new authors')
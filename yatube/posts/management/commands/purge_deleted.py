@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import deletion
+
+
+class Command(BaseCommand):
+    help = 'Delete hidden posts, comments and accounts in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=deletion.BATCH_SIZE,
+            help='Rows deleted per transaction.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Seconds to sleep between batches.'
+        )
+
+    def handle(self, *args, **options):
+        report = deletion.purge(options['batch_size'], options['pause'])
+        self.stdout.write(
+            f"Deleted comments: {report['comments']}, "
+            f"posts: {report['posts']}, users: {report['users']}"
+        )
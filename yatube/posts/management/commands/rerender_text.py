@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored HTML of posts and comments after a markup change'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows rendered and saved per query.'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-render every row, not only outdated ones.'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            count = self.rerender(model, options['batch_size'], options['all'])
+            self.stdout.write(f'{model.__name__}: re-rendered {count}')
+
+    @staticmethod
+    def rerender(model, batch_size, everything):
+        queryset = model.objects.order_by('pk').only('pk', 'text')
+        if not everything:
+            queryset = queryset.exclude(text_html_version=markup.VERSION)
+        count = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return count
+            for obj in batch:
+                obj.render_text()
+            model.objects.bulk_update(
+                batch, ['text_html', 'text_html_version']
+            )
+            count += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,59 @@
+import re
+
+from django.urls import NoReverseMatch, reverse
+from django.utils.html import escape, format_html
+
+# Поднимаем версию при любом изменении разметки: по ней команда
+# rerender_text находит и перерисовывает устаревшие записи.
+VERSION = 1
+
+TOKEN_RE = re.compile(
+    r'(?P<url>https?://[^\s<>"]+)'
+    r'|(?<![\w@])@(?P<mention>\w(?:[\w.@+-]*\w)?)'
+    r'|(?<![\w#])#(?P<tag>[-a-zA-Z0-9_]+)'
+)
+TRAILING_PUNCTUATION = '.,:;!?)'
+
+
+def _url(url):
+    trail = ''
+    while url and url[-1] in TRAILING_PUNCTUATION:
+        url, trail = url[:-1], url[-1] + trail
+    link = format_html(
+        '<a href="{}" rel="nofollow noopener" target="_blank">{}</a>',
+        url, url
+    )
+    return link + escape(trail)
+
+
+def _link(name, args, text):
+    try:
+        href = reverse(name, args=args)
+    except NoReverseMatch:
+        return escape(text)
+    return format_html('<a href="{}">{}</a>', href, text)
+
+
+def _token(match):
+    if match.group('url'):
+        return _url(match.group('url'))
+    if match.group('mention'):
+        return _link('profile', [match.group('mention')], match.group(0))
+    return _link('group', [match.group('tag')], match.group(0))
+
+
+def render(text):
+    """Escaped HTML of a post or comment body.
+
+    Links URLs, ``@username`` mentions and ``#group`` tags and keeps line
+    breaks, like ``linebreaksbr`` did in the templates.
+    """
+    parts = []
+    position = 0
+    for match in TOKEN_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_token(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    html = ''.join(parts)
+    return html.replace('\r\n', '\n').replace('\n', '<br>')
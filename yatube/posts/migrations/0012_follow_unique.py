@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-19 07:10
+
+from django.db import migrations, models
+from django.db.models import Min
+import django.db.models.expressions
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    db = schema_editor.connection.alias
+    keep = Follow.objects.using(db).values('user', 'author').annotate(
+        keep=Min('pk')
+    ).values_list('keep', flat=True)
+    Follow.objects.using(db).exclude(pk__in=list(keep)).delete()
+    Follow.objects.using(db).filter(
+        user=django.db.models.expressions.F('author')
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_rendered_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(('user', django.db.models.expressions.F('author')), _negated=True), name='no_self_follow'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 2.2.6 on 2026-10-19 08:50
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_monthly_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    MonthlyCount = apps.get_model('posts', 'MonthlyCount')
+    db = schema_editor.connection.alias
+    counts = Counter()
+    posts = Post.objects.using(db).values_list(
+        'pub_date', 'author_id', 'group_id'
+    ).iterator()
+    for pub_date, author_id, group_id in posts:
+        if timezone.is_aware(pub_date):
+            pub_date = timezone.localtime(pub_date)
+        month = (pub_date.year, pub_date.month)
+        counts[('index', 0) + month] += 1
+        counts[('author', author_id) + month] += 1
+        if group_id is not None:
+            counts[('group', group_id) + month] += 1
+    MonthlyCount.objects.using(db).bulk_create([
+        MonthlyCount(
+            feed=feed, object_id=object_id, year=year, month=month,
+            posts=posts
+        )
+        for (feed, object_id, year, month), posts in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=10)),
+                ('object_id', models.PositiveIntegerField(default=0, help_text='Группа или автор; 0 для общей ленты')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('posts', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlycount',
+            constraint=models.UniqueConstraint(fields=('feed', 'object_id', 'year', 'month'), name='unique_monthly_count'),
+        ),
+        migrations.RunPython(
+            fill_monthly_counts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.6 on 2026-10-19 09:31
+
+from collections import Counter
+
+import core.storage
+from django.db import migrations, models
+
+
+def count_image_refs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    StoredFile = apps.get_model('core', 'StoredFile')
+    db = schema_editor.connection.alias
+    refs = Counter(
+        Post.objects.using(db).exclude(image__isnull=True).exclude(image='')
+        .values_list('image', flat=True).iterator()
+    )
+    StoredFile.objects.using(db).bulk_create([
+        StoredFile(name=name, refs=count) for name, count in refs.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0015_monthly_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/'),
+        ),
+        migrations.RunPython(count_image_refs, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,46 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
+from . import markup
+
 User = get_user_model()
 
 
-class Post(models.Model):
+class RenderedTextModel(models.Model):
+    """Keeps ``text`` pre-rendered to HTML, so templates skip the markup."""
+
+    text_html = models.TextField(blank=True, editable=False)
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        self.text_html = markup.render(self.text)
+        self.text_html_version = markup.VERSION
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'text_html', 'text_html_version'
+            }
+        super().save(*args, **kwargs)
+
+
+class VisibleManager(models.Manager):
+    """Hides rows marked ``deleted`` until ``purge_deleted`` removes them."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted=False)
+
+
+class Post(RenderedTextModel):
     text = models.TextField()
     pub_date = models.DateTimeField("date published", auto_now_add=True)
     author = models.ForeignKey(User,
@@ -14,10 +50,19 @@ class Post(models.Model):
                               on_delete=models.SET_NULL,
                               blank=True, null=True,
                               related_name="groups")
-    image = models.ImageField(upload_to="posts/", blank=True, null=True)
+    image = models.ImageField(upload_to="posts/",
+                              storage=ContentAddressedStorage(),
+                              blank=True, null=True)
+    deleted = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
 
     class Meta:
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-pk"]
+        indexes = [
+            models.Index(fields=["id"], name="post_deleted",
+                         condition=models.Q(deleted=True)),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -32,7 +77,7 @@ class Group(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(RenderedTextModel):
     post = models.ForeignKey("Post",
                              on_delete=models.CASCADE,
                              blank=True, null=True,
@@ -41,9 +86,16 @@ class Comment(models.Model):
                                on_delete=models.CASCADE)
     text = models.TextField()
     created = models.DateTimeField("date published", auto_now_add=True)
+    deleted = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["id"], name="comment_deleted",
+                         condition=models.Q(deleted=True)),
+        ]
 
     def __str__(self):
         return self.text
@@ -56,3 +108,95 @@ class Follow(models.Model):
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
                                related_name="following")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_follow"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F("author")),
+                name="no_self_follow"
+            ),
+        ]
+
+
+class Suggestion(models.Model):
+    """Author suggested to a user by the ``compute_suggestions`` job."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name="suggestions")
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name="+")
+    score = models.PositiveIntegerField(
+        help_text="Сколько авторов из подписок пользователя подписаны на него"
+    )
+
+    class Meta:
+        ordering = ["-score", "author"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_suggestion"
+            ),
+        ]
+
+
+class ActivityBucket(models.Model):
+    """Comments and views of a post during one hour, for trending."""
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name="+")
+    hour = models.PositiveIntegerField(
+        db_index=True, help_text="Часов с начала эпохи"
+    )
+    comments = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "hour"], name="unique_activity_bucket"
+            ),
+        ]
+
+
+class TrendingPost(models.Model):
+    """Top of the trending ranking, rebuilt by ``compact_trending``."""
+    post = models.OneToOneField(Post,
+                                on_delete=models.CASCADE,
+                                related_name="+")
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["rank"]
+
+
+class MonthlyCount(models.Model):
+    """Number of posts per month in a feed, kept by the post signals."""
+    feed = models.CharField(max_length=10)
+    object_id = models.PositiveIntegerField(
+        default=0, help_text="Группа или автор; 0 для общей ленты"
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    posts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-year", "-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["feed", "object_id", "year", "month"],
+                name="unique_monthly_count"
+            ),
+        ]
+
+
+class UserDeletion(models.Model):
+    """Account waiting for ``purge_deleted`` to remove it in batches."""
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name="+")
+    requested = models.DateTimeField(auto_now_add=True)
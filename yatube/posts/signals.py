@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core import pagecache, storage
+
+from . import archive, caching, deletion
+from .holes import nav_key
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Post)
+def remember_loaded_fields(sender, instance, **kwargs):
+    # не трогаем атрибуты, если поля отложены: иначе лишний запрос
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    image = instance.__dict__.get('image', DEFERRED)
+    instance._loaded_image = getattr(image, 'name', image) or None
+
+
+def _image_changed(post, old_name):
+    new_name = post.image.name or None
+    if new_name == old_name or old_name is DEFERRED:
+        return
+    if new_name is not None:
+        storage.acquire(new_name)
+    if old_name is not None:
+        storage.release(old_name, post.image.storage)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created=False, **kwargs):
+    group_ids = [instance._loaded_group_id]
+    if created:
+        archive.post_added(instance)
+        caching.adjust_post_counts(instance, 1)
+    elif instance._loaded_group_id != instance.group_id:
+        archive.post_moved(instance, instance._loaded_group_id)
+        caching.move_post_count(instance, instance._loaded_group_id)
+    caching.drop_feed_heads(instance, group_ids)
+    caching.purge_post_pages(instance, group_ids)
+    _image_changed(instance, None if created else instance._loaded_image)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name or None
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    # скрытый пост уже убран из счётчиков при пометке
+    if not instance.deleted:
+        deletion.forget(instance)
+    if instance.image:
+        storage.release(instance.image.name, instance.image.storage)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if instance.post_id is not None and not instance.deleted:
+        caching.purge_post_pages(instance.post)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    caching.follows_changed(instance.user_id, [instance.author_id])
+
+
+@receiver(post_init, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.invalidate_lookups(Group, instance._loaded_slug, instance.slug)
+    instance._loaded_slug = instance.slug
+    pagecache.purge('index', f'group:{instance.pk}')
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    caching.invalidate_lookups(
+        User, instance._loaded_username, instance.username
+    )
+    instance._loaded_username = instance.username
+    cache.delete(nav_key(instance.pk))
+    pagecache.purge(f'author:{instance.pk}')
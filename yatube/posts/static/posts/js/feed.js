@@ -0,0 +1,87 @@
+// Живая лента: опрос на новые записи и подгрузка следующих записей.
+// Сервер отвечает готовыми карточками записей, страница целиком
+// не перезагружается.
+(function () {
+  var feed = document.getElementById('feed');
+  if (!feed) {
+    return;
+  }
+
+  function getJSON(url, params) {
+    return fetch(url + '?' + new URLSearchParams(params), {
+      credentials: 'same-origin'
+    }).then(function (response) { return response.json(); });
+  }
+
+  // Курсор кешированной ленты лежит в самом фрагменте, рядом с карточками,
+  // по которым он посчитан.
+  var cursor = document.getElementById('feed-cursor');
+  if (cursor) {
+    feed.dataset.cursor = cursor.dataset.cursor;
+  }
+
+  // Новые записи выше курсора.
+  var banner = document.getElementById('feed-updates');
+  if (banner && feed.dataset.updatesUrl) {
+    var pending = null;
+
+    var poll = function () {
+      var params = {feed: feed.dataset.feed, after: feed.dataset.cursor || 0};
+      if (feed.dataset.slug) {
+        params.slug = feed.dataset.slug;
+      }
+      getJSON(feed.dataset.updatesUrl, params).then(function (data) {
+        if (!data.count) {
+          return;
+        }
+        pending = data;
+        banner.textContent = 'Новых записей: ' + data.count + '. Показать';
+        banner.hidden = false;
+      }).catch(function () {});
+    };
+
+    banner.addEventListener('click', function () {
+      if (pending) {
+        feed.insertAdjacentHTML('afterbegin', pending.html);
+        feed.dataset.cursor = pending.cursor;
+        pending = null;
+      }
+      banner.hidden = true;
+    });
+
+    setInterval(poll, parseInt(feed.dataset.interval, 10) || 30000);
+  }
+
+  // Следующие записи ниже последней показанной.
+  var more = document.getElementById('feed-more');
+  if (more) {
+    var loading = false;
+
+    var loadMore = function () {
+      if (loading || !more.dataset.next) {
+        return;
+      }
+      loading = true;
+      getJSON(more.dataset.fragmentUrl, {
+        fragment: 1, before: more.dataset.next
+      }).then(function (data) {
+        more.insertAdjacentHTML('beforebegin', data.html);
+        if (data.next) {
+          more.dataset.next = data.next;
+        } else {
+          more.remove();
+        }
+        loading = false;
+      }).catch(function () { loading = false; });
+    };
+
+    more.addEventListener('click', loadMore);
+    if ('IntersectionObserver' in window) {
+      new IntersectionObserver(function (entries) {
+        if (entries[0].isIntersecting) {
+          loadMore();
+        }
+      }, {rootMargin: '400px'}).observe(more);
+    }
+  }
+})();
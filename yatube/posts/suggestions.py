@@ -0,0 +1,67 @@
+import heapq
+from array import array
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow, Suggestion
+
+TOP_N = 10
+GENERATION_KEY = 'suggestions.generation'
+
+
+def generation():
+    """Stamp of the last job run, part of every cached suggestions hole."""
+    return cache.get(GENERATION_KEY, 0)
+
+
+def load_graph():
+    """Followees of every user as sorted arrays, in a single query."""
+    rows = Follow.objects.order_by('user_id', 'author_id').values_list(
+        'user_id', 'author_id'
+    ).iterator()
+    return {
+        user_id: array('q', (author_id for _, author_id in group))
+        for user_id, group in groupby(rows, key=itemgetter(0))
+    }
+
+
+def rank(graph, user_id, top_n=TOP_N):
+    """Authors followed by the authors ``user_id`` follows.
+
+    The score is the number of the user's followees following the
+    candidate; ties go to the smaller id.
+    """
+    followees = graph.get(user_id, ())
+    counts = Counter()
+    for followee in followees:
+        counts.update(graph.get(followee, ()))
+    for known in followees:
+        counts.pop(known, None)
+    counts.pop(user_id, None)
+    return heapq.nsmallest(
+        top_n, counts.items(), key=lambda item: (-item[1], item[0])
+    )
+
+
+def compute(top_n=TOP_N, batch_size=1000):
+    """Replace every stored suggestion; returns the number of users.
+
+    The whole follow graph is read once and ranked in memory, so the job
+    makes one query for the graph and one insert per ``batch_size`` rows
+    instead of a multi-join per user.
+    """
+    graph = load_graph()
+    rows = [
+        Suggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in graph
+        for author_id, score in rank(graph, user_id, top_n)
+    ]
+    with transaction.atomic():
+        Suggestion.objects.all().delete()
+        Suggestion.objects.bulk_create(rows, batch_size=batch_size)
+    cache.set(GENERATION_KEY, generation() + 1, None)
+    return len(graph)
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -7,6 +8,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core import throttle
 from posts.forms import CommentForm, PostForm
 from posts.models import Comment, Group, Post
 
@@ -56,6 +58,9 @@ class PostCreateFormTests(TestCase):
         shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
         return super().tearDownClass()
 
+    def setUp(self):
+        throttle.reset()
+
     def test_create_post(self):
         """Create post authorized user test"""
         response = self.authorized_client.post(
@@ -64,7 +69,8 @@ class PostCreateFormTests(TestCase):
             follow=True
         )
         test_text = PostCreateFormTests.form_data['text']
-        test_image = f'posts/{PostCreateFormTests.uploaded}'
+        digest = hashlib.sha256(PostCreateFormTests.small_gif).hexdigest()
+        test_image = f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif'
         self.assertRedirects(response, reverse('index'))
         self.assertEqual(
             Post.objects.count(),
@@ -119,6 +125,9 @@ class PostEditFormTest(TestCase):
             group=PostEditFormTest.group
         ).count()
 
+    def setUp(self):
+        throttle.reset()
+
     def test_edit_post(self):
         form_data = {
             'text': 'Отредактированно!',
@@ -168,6 +177,9 @@ class CommentFormTest(TestCase):
         cls.authorized_client.force_login(cls.user)
         cls.form = CommentForm()
 
+    def setUp(self):
+        throttle.reset()
+
     def test_comment_authorized_user(self):
         form_data = {
             'text': 'Новый комментарий!',
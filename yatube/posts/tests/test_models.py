@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
+from posts import markup
 from posts.models import Group, Post
 
 User = get_user_model()
@@ -30,3 +34,37 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class RenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='tester')
+
+    def test_text_rendered_on_save(self):
+        """Post body is stored escaped, linked and with line breaks."""
+        post = Post.objects.create(
+            text='<b>Привет</b> @tester\n#test https://ya.ru/?a=1&b=2.',
+            author=RenderedTextTest.author
+        )
+        self.assertEqual(post.text_html, (
+            '&lt;b&gt;Привет&lt;/b&gt; <a href="/tester/">@tester</a><br>'
+            '<a href="/group/test/">#test</a> '
+            '<a href="https://ya.ru/?a=1&amp;b=2" rel="nofollow noopener" '
+            'target="_blank">https://ya.ru/?a=1&amp;b=2</a>.'
+        ))
+        self.assertEqual(post.text_html_version, markup.VERSION)
+
+    def test_rerender_command(self):
+        """Outdated rows are re-rendered in bulk."""
+        post = Post.objects.create(
+            text='Текст', author=RenderedTextTest.author
+        )
+        Post.objects.filter(pk=post.pk).update(
+            text='Новый текст', text_html='', text_html_version=0
+        )
+        call_command('rerender_text', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый текст')
+        self.assertEqual(post.text_html_version, markup.VERSION)
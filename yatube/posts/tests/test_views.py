@@ -1,15 +1,32 @@
 import shutil
 import tempfile
+import time
+from importlib import import_module
+from datetime import datetime
+from io import StringIO
+from unittest import mock
 
 from django import forms
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Follow, Group, Post
+from core import throttle
+from core.paginator import cached_count
+from posts import archive, deletion, follow_graph, suggestions, trending
+from posts.caching import (LOOKUP_MISS_TIMEOUT, count_key, group_or_404,
+                           user_or_404)
+from posts.models import (ActivityBucket, Comment, Follow, Group,
+                          MonthlyCount, Post, Suggestion, TrendingPost,
+                          UserDeletion)
 
 User = get_user_model()
 
@@ -345,3 +362,532 @@ class FollowViewTest(TestCase):
             reverse('follow_index')
         )
         self.assertEqual(len(response.context.get('page')), 0)
+
+
+class FeedUpdatesViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test-slug',
+            description='тестовая группа ура-ура'
+        )
+        cls.author = User.objects.create(username='test_author')
+        cls.post = Post.objects.create(
+            text='Первая запись',
+            group=FeedUpdatesViewTest.group,
+            author=FeedUpdatesViewTest.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test_follower')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+
+    def get_updates(self, **params):
+        return self.authorized_client.get(
+            reverse('feed_updates'), params
+        ).json()
+
+    def test_no_updates_without_queries(self):
+        """Poll with nothing new does not touch the database."""
+        self.get_updates(after=self.post.pk)
+        with self.assertNumQueries(0):
+            data = self.get_updates(after=self.post.pk)
+        self.assertEqual(data['count'], 0)
+
+    def test_new_posts_are_returned(self):
+        """Newer posts are counted and rendered for every feed."""
+        self.get_updates(after=self.post.pk)
+        new_post = Post.objects.create(
+            text='Свежая запись', group=self.group, author=self.author
+        )
+        for params in ({'feed': 'index'},
+                       {'feed': 'group', 'slug': self.group.slug},
+                       {'feed': 'follow'}):
+            with self.subTest(**params):
+                data = self.get_updates(after=self.post.pk, **params)
+                self.assertEqual(data['count'], 1)
+                self.assertEqual(data['cursor'], new_post.pk)
+                self.assertIn('Свежая запись', data['html'])
+
+
+class FeedFragmentViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='test-slug',
+            description='тестовая группа ура-ура'
+        )
+        cls.author = User.objects.create(username='test_author')
+        for i in range(13):
+            Post.objects.create(
+                text=f'Запись номер {i}',
+                group=FeedFragmentViewTest.group,
+                author=FeedFragmentViewTest.author
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test_follower')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.author.username}),
+            reverse('follow_index'),
+        )
+
+    def test_fragment_pages(self):
+        """Fragment mode returns cards page by page by cursor."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.authorized_client.get(
+                    url, {'fragment': 1}
+                ).json()
+                self.assertEqual(first['html'].count('card-body'), 10)
+                self.assertNotIn('<nav', first['html'])
+                second = self.authorized_client.get(
+                    url, {'fragment': 1, 'before': first['next']}
+                ).json()
+                self.assertEqual(second['html'].count('card-body'), 3)
+                self.assertIsNone(second['next'])
+                self.assertIn('Запись номер 0', second['html'])
+
+    def test_cursor_matches_rendered_posts(self):
+        """Feed cursor comes from the cached cards, not the live feed."""
+        newest = Post.objects.latest('pk')
+        urls = self.urls[:2]
+        for url in urls:
+            self.authorized_client.get(url).content
+        Post.objects.create(
+            text='Свежая запись', group=self.group, author=self.author
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.authorized_client.get(url),
+                    f'id="feed-cursor" data-cursor="{newest.pk}"'
+                )
+
+    def test_full_page_links_next_fragment(self):
+        """Full page carries the cursor of its last post."""
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'id="feed-more"')
+
+
+class LookupCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(
+            username='test_author', first_name='Лев'
+        )
+        self.group = Group.objects.create(title='test group', slug='test-slug')
+
+    def test_lookups_are_cached(self):
+        """Repeated username and slug lookups skip the database."""
+        user_or_404(self.author.username)
+        group_or_404(self.group.slug)
+        with self.assertNumQueries(0):
+            author = user_or_404(self.author.username)
+            group = group_or_404(self.group.slug)
+        self.assertEqual(author, self.author)
+        self.assertEqual(author.get_full_name(), 'Лев')
+        self.assertEqual(group.title, self.group.title)
+
+    def test_changes_invalidate_lookups(self):
+        """Renames and new users are seen right away."""
+        user_or_404(self.author.username)
+        with self.assertRaises(Http404):
+            user_or_404('newcomer')
+        self.author.username = 'renamed'
+        self.author.save()
+        User.objects.create(username='newcomer')
+        with self.assertRaises(Http404):
+            user_or_404('test_author')
+        self.assertEqual(user_or_404('renamed'), self.author)
+        self.assertEqual(user_or_404('newcomer').username, 'newcomer')
+
+    def test_misses_expire_quickly(self):
+        """Missing names are looked up again after LOOKUP_MISS_TIMEOUT."""
+        with self.assertRaises(Http404):
+            user_or_404('nobody')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            user_or_404('nobody')
+        later = time.time() + LOOKUP_MISS_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later), \
+                self.assertNumQueries(1), self.assertRaises(Http404):
+            user_or_404('nobody')
+
+
+class PostCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='test_author')
+        self.group = Group.objects.create(title='test group', slug='test-slug')
+        self.other = Group.objects.create(title='other', slug='other-slug')
+        self.feeds = {
+            count_key('index'): Post.objects.all(),
+            count_key('group', self.group.pk): self.group.groups.all(),
+            count_key('group', self.other.pk): self.other.groups.all(),
+        }
+
+    def counts(self):
+        return [cached_count(key, posts) for key, posts in self.feeds.items()]
+
+    def test_writes_adjust_cached_counts(self):
+        """Adding, moving and deleting posts adjusts totals in place."""
+        post = Post.objects.create(
+            text='Запись', group=self.group, author=self.author
+        )
+        self.assertEqual(self.counts(), [1, 1, 0])
+        Post.objects.create(
+            text='Вторая запись', group=self.group, author=self.author
+        )
+        post.group = self.other
+        post.save()
+        deletion.delete_post(post)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.counts(), [1, 1, 0])
+
+    def test_edit_keeps_cached_counts(self):
+        """Editing a post's text leaves the totals alone."""
+        post = Post.objects.create(
+            text='Запись', group=self.group, author=self.author
+        )
+        self.counts()
+        post.text = 'Правка'
+        with mock.patch('posts.caching.adjust_count') as adjust:
+            post.save()
+        adjust.assert_not_called()
+
+
+class FollowGraphTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='test_author')
+        self.readers = [
+            User.objects.create(username=f'reader_{i}') for i in range(3)
+        ]
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+
+    def test_graph_answers_without_queries(self):
+        """Membership and counts come from the cached arrays."""
+        reader = self.readers[0]
+        follow_graph.followers(self.author.pk)
+        follow_graph.followees(reader.pk)
+        follow_graph.followees(self.author.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(reader.pk, self.author.pk)
+            )
+            self.assertFalse(
+                follow_graph.is_following(self.author.pk, reader.pk)
+            )
+            self.assertEqual(follow_graph.followers_count(self.author.pk), 3)
+
+    def test_writes_invalidate_graph(self):
+        """Follows and unfollows are seen right away."""
+        reader = self.readers[0]
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(follow_graph.following_count(self.author.pk), 0)
+        client.get(reverse('profile_follow', args=[reader.username]))
+        self.assertTrue(follow_graph.is_following(self.author.pk, reader.pk))
+        client.get(reverse('profile_unfollow', args=[reader.username]))
+        self.assertFalse(
+            follow_graph.is_following(self.author.pk, reader.pk)
+        )
+
+    def test_follow_list_pages(self):
+        """Followers and following pages list the right users."""
+        response = self.client.get(
+            reverse('followers', args=[self.author.username])
+        )
+        self.assertEqual(
+            [user.username for user in response.context['page']],
+            [reader.username for reader in self.readers]
+        )
+        response = self.client.get(
+            reverse('following', args=[self.readers[0].username])
+        )
+        self.assertEqual(list(response.context['page']), [self.author])
+
+
+class FollowBulkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttle.reset()
+        self.user = User.objects.create(username='newcomer')
+        self.authors = [
+            User.objects.create(username=f'author_{i}') for i in range(3)
+        ]
+        self.usernames = [author.username for author in self.authors]
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_is_idempotent(self):
+        """Repeated follows leave one row and self-follows none."""
+        url = reverse('profile_follow', args=[self.usernames[0]])
+        self.authorized_client.get(url)
+        self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('profile_follow', args=[self.user.username])
+        )
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(follow_graph.following_count(self.user.pk), 1)
+
+    def test_bulk_endpoint(self):
+        """Many authors are followed and unfollowed in one request."""
+        url = reverse('follow_bulk')
+        response = self.authorized_client.post(
+            url, {'author': self.usernames + ['missing']}
+        )
+        self.assertEqual(response.json(), {'followed': 3})
+        self.assertEqual(follow_graph.following_count(self.user.pk), 3)
+        response = self.authorized_client.post(url, {'author': self.usernames})
+        self.assertEqual(response.json(), {'followed': 0})
+        response = self.authorized_client.post(
+            url, {'author': self.usernames[:2], 'action': 'unfollow'}
+        )
+        self.assertEqual(response.json(), {'unfollowed': 2})
+        self.assertEqual(
+            list(follow_graph.followees(self.user.pk)),
+            [self.authors[2].pk]
+        )
+
+    def test_command(self):
+        """The command follows the given authors."""
+        call_command(
+            'follow_authors', self.user.username, *self.usernames,
+            stdout=StringIO()
+        )
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 3)
+
+
+class SuggestionsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, self.friend, self.other, self.star = [
+            User.objects.create(username=name)
+            for name in ('user', 'friend', 'other', 'star')
+        ]
+        for user, author in [(self.user, self.friend),
+                             (self.user, self.other),
+                             (self.friend, self.star),
+                             (self.other, self.star),
+                             (self.friend, self.user),
+                             (self.other, self.friend)]:
+            Follow.objects.create(user=user, author=author)
+
+    def test_ranking(self):
+        """Authors followed by followees are ranked by shared count."""
+        suggestions.compute()
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=self.user).values_list(
+                'author__username', 'score'
+            )),
+            [('star', 2)]
+        )
+
+    def test_shown_until_followed(self):
+        """Suggestions show on the follow page and drop once followed."""
+        suggestions.compute()
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('follow_index')
+        self.assertContains(client.get(url), '@star')
+        client.get(reverse('profile_follow', args=['star']))
+        self.assertNotContains(client.get(url), '@star')
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        trending.flush_views()
+        cache.clear()
+        throttle.reset()
+        self.author = User.objects.create(username='test_author')
+        self.quiet, self.viewed, self.discussed = [
+            Post.objects.create(text=text, author=self.author)
+            for text in ('тихий', 'просматриваемый', 'обсуждаемый')
+        ]
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_activity_is_ranked(self):
+        """Views and comments end up in the trending table in order."""
+        for _ in range(3):
+            self.client.get(
+                reverse('post', args=[self.author.username, self.viewed.pk])
+            )
+        self.authorized_client.post(
+            reverse('add_comment',
+                    args=[self.author.username, self.discussed.pk]),
+            {'text': 'Комментарий'}
+        )
+        trending.compact()
+        posts = self.client.get(reverse('trending')).context['posts']
+        self.assertEqual(posts, [self.discussed, self.viewed])
+
+    def test_cached_views_outlive_default_timeout(self):
+        """View counts stay in the cache for VIEWS_TIMEOUT, not 300 s."""
+        hour = trending.current_hour()
+        for _ in range(3):
+            trending.record_view(self.viewed.pk)
+        trending.record_view(self.quiet.pk)
+        trending.flush_views()
+        with mock.patch('time.time', return_value=time.time() + 400):
+            self.assertEqual(
+                trending._cached_views(hour),
+                {self.viewed.pk: 3, self.quiet.pk: 1}
+            )
+
+    def test_views_are_buffered_in_process(self):
+        """Views reach the cache only when the process flushes them."""
+        hour = trending.current_hour()
+        with mock.patch.object(cache, 'incr') as incr:
+            for _ in range(3):
+                trending.record_view(self.viewed.pk)
+        incr.assert_not_called()
+        self.assertEqual(trending._cached_views(hour), {})
+        trending.flush_views()
+        self.assertEqual(trending._cached_views(hour), {self.viewed.pk: 3})
+
+    def test_old_activity_decays(self):
+        """Older buckets weigh less and leave the window."""
+        hour = trending.current_hour()
+        ActivityBucket.objects.create(post=self.quiet, hour=hour, views=1)
+        ActivityBucket.objects.create(
+            post=self.viewed, hour=hour - trending.HALF_LIFE_HOURS, views=3
+        )
+        ActivityBucket.objects.create(
+            post=self.discussed, hour=hour - trending.WINDOW_HOURS,
+            comments=10
+        )
+        trending.compact()
+        self.assertEqual(
+            [entry.post for entry in TrendingPost.objects.all()],
+            [self.viewed, self.quiet]
+        )
+        self.assertFalse(
+            ActivityBucket.objects.filter(post=self.discussed).exists()
+        )
+
+
+class ArchiveViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='test_author')
+        self.group = Group.objects.create(title='test group', slug='test-slug')
+        self.old = Post.objects.create(
+            text='Старая запись', author=self.author, group=self.group
+        )
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=datetime(2020, 5, 17, 12, tzinfo=timezone.utc)
+        )
+        MonthlyCount.objects.all().delete()
+        migration = import_module('posts.migrations.0015_monthly_count')
+        migration.fill_monthly_counts(apps, connection.schema_editor())
+        self.new = Post.objects.create(
+            text='Новая запись', author=self.author, group=self.group
+        )
+
+    def test_rollup_follows_writes(self):
+        """Counts are backfilled and kept on create, move and delete."""
+        now = timezone.now()
+        self.assertEqual(archive.months('group', self.group.pk), [
+            (now.year, now.month, 1), (2020, 5, 1)
+        ])
+        self.new.group = None
+        self.new.save()
+        self.assertEqual(
+            archive.months('group', self.group.pk), [(2020, 5, 1)]
+        )
+        self.new.delete()
+        self.assertEqual(archive.months('index'), [(2020, 5, 1)])
+
+    def test_archive_pages(self):
+        """Month pages show only that month's posts."""
+        urls = (
+            reverse('archive', args=[2020, 5]),
+            reverse('group_archive', args=[self.group.slug, 2020, 5]),
+            reverse('profile_archive', args=[self.author.username, 2020, 5]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                page = self.client.get(url).context['page']
+                self.assertEqual(list(page), [self.old])
+                self.assertEqual(page.paginator.count, 1)
+        page = self.client.get(reverse('archive')).context['page']
+        self.assertEqual(list(page), [self.new])
+        self.assertEqual(
+            self.client.get(reverse('archive', args=[2020, 13])).status_code,
+            404
+        )
+
+
+class DeletionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='test_author')
+        self.reader = User.objects.create(username='test_reader')
+        self.group = Group.objects.create(title='test group', slug='test-slug')
+        self.posts = [
+            Post.objects.create(
+                text=f'Запись {i}', author=self.author, group=self.group
+            )
+            for i in range(3)
+        ]
+        self.other = Post.objects.create(text='Чужая', author=self.reader)
+        Comment.objects.create(
+            post=self.other, author=self.author, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.author)
+
+    def test_deleted_post_hidden_until_purged(self):
+        """A deleted post disappears at once and its rows go in the purge."""
+        post = self.posts[0]
+        page = self.client.get(reverse('index')).context['page']
+        self.assertEqual(page.paginator.count, 4)
+        self.client.get(
+            reverse('delete', args=[self.author.username, post.pk])
+        )
+        self.assertTrue(Post._base_manager.filter(pk=post.pk).exists())
+        page = self.client.get(reverse('index')).context['page']
+        self.assertNotIn(post, page)
+        self.assertEqual(page.paginator.count, 3)
+        self.assertEqual(archive.months('group', self.group.pk)[0][2], 2)
+        self.assertEqual(self.client.get(
+            reverse('post', args=[self.author.username, post.pk])
+        ).status_code, 404)
+        report = deletion.purge(batch_size=1)
+        self.assertEqual(report['posts'], 1)
+        self.assertFalse(Post._base_manager.filter(pk=post.pk).exists())
+        self.assertEqual(archive.months('group', self.group.pk)[0][2], 2)
+
+    def test_deleted_user_purged_in_batches(self):
+        """A deleted account is hidden, then removed with its content."""
+        deletion.delete_user(self.author)
+        self.assertEqual(self.client.get(
+            reverse('profile', args=[self.author.username])
+        ).status_code, 404)
+        self.assertEqual(list(Post.objects.all()), [self.other])
+        self.assertFalse(self.other.comments.exists())
+        self.assertEqual(archive.months('index')[0][2], 1)
+        out = StringIO()
+        call_command('purge_deleted', batch_size=2, pause=0, stdout=out)
+        self.assertIn('comments: 1, posts: 3, users: 1', out.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(UserDeletion.objects.exists())
+        self.assertFalse(Comment._base_manager.exists())
+        self.assertEqual(follow_graph.following_count(self.reader.pk), 0)
@@ -0,0 +1,171 @@
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from core import pagecache
+
+from .models import ActivityBucket, Post, TrendingPost
+
+WINDOW_HOURS = 48
+HALF_LIFE_HOURS = 6
+COMMENT_WEIGHT = 5
+TOP_K = 20
+VIEWS_TIMEOUT = WINDOW_HOURS * 60 * 60
+# просмотры копятся в памяти процесса и раз в столько секунд уходят в кеш
+VIEWS_FLUSH_SECONDS = 10
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flushed_at = time.time()
+
+
+def current_hour(now=None):
+    return int((time.time() if now is None else now) // 3600)
+
+
+def _views_key(hour, post_id):
+    return f'trending.views.{hour}.{post_id}'
+
+
+def _viewed_count_key(hour):
+    return f'trending.viewed.{hour}'
+
+
+def _viewed_key(hour, index):
+    return f'trending.viewed.{hour}.{index}'
+
+
+def record(post_id, comments=0, views=0, hour=None):
+    """Add activity to the post's bucket for ``hour``, the current one by
+    default.
+    """
+    hour = current_hour() if hour is None else hour
+    bucket = ActivityBucket.objects.filter(post_id=post_id, hour=hour)
+    changes = {
+        'comments': F('comments') + comments, 'views': F('views') + views
+    }
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ActivityBucket.objects.create(
+                post_id=post_id, hour=hour, comments=comments, views=views
+            )
+    except IntegrityError:
+        # параллельный запрос успел создать корзину первым, или пост удалён
+        bucket.update(**changes)
+
+
+def record_view(post_id):
+    """Count a view in process memory.
+
+    Views come from page cache hits too, which must stay free of queries
+    and cache writes. Every ``VIEWS_FLUSH_SECONDS`` the request that
+    notices it moves the counts to the cache with ``flush_views``;
+    ``compact`` moves them on to the buckets.
+    """
+    now = time.time()
+    with _pending_lock:
+        _pending[current_hour(now), post_id] += 1
+        due = now - _flushed_at >= VIEWS_FLUSH_SECONDS
+    if due:
+        flush_views()
+
+
+def flush_views():
+    """Add the views counted in this process to the cache.
+
+    The first view of a post in an hour registers it under its own number
+    from a per-hour counter, so concurrent flushes never overwrite each
+    other's list of viewed posts.
+    """
+    global _flushed_at
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.time()
+    for (hour, post_id), views in pending.items():
+        if not cache.add(_views_key(hour, post_id), views, VIEWS_TIMEOUT):
+            try:
+                cache.incr(_views_key(hour, post_id), views)
+            except ValueError:
+                pass
+            continue
+        cache.add(_viewed_count_key(hour), 0, VIEWS_TIMEOUT)
+        index = cache.incr(_viewed_count_key(hour))
+        cache.set(_viewed_key(hour, index), post_id, VIEWS_TIMEOUT)
+
+
+def _viewed_keys(hour):
+    count = cache.get(_viewed_count_key(hour), 0)
+    return [_viewed_key(hour, index) for index in range(1, count + 1)]
+
+
+def _cached_views(hour, viewed_keys=None):
+    if viewed_keys is None:
+        viewed_keys = _viewed_keys(hour)
+    post_ids = set(cache.get_many(viewed_keys).values())
+    counts = cache.get_many([_views_key(hour, pk) for pk in post_ids])
+    return {pk: counts.get(_views_key(hour, pk), 0) for pk in post_ids}
+
+
+def _flush_views(hour):
+    viewed_keys = _viewed_keys(hour)
+    views = _cached_views(hour, viewed_keys)
+    for post_id, count in views.items():
+        if count:
+            record(post_id, views=count, hour=hour)
+    cache.delete_many([
+        _viewed_count_key(hour), *viewed_keys,
+        *(_views_key(hour, pk) for pk in views),
+    ])
+
+
+def score(comments, views, age_hours):
+    return (comments * COMMENT_WEIGHT + views) * 0.5 ** (
+        age_hours / HALF_LIFE_HOURS
+    )
+
+
+def compact(now=None):
+    """Flush cached views, drop old buckets and rebuild the top-K table.
+
+    Views of finished hours are written to their buckets; those of the
+    current hour are only added to the scores and stay in the cache.
+    Returns the number of posts ranked.
+    """
+    hour = current_hour(now)
+    flush_views()
+    for past in range(hour - WINDOW_HOURS + 1, hour):
+        _flush_views(past)
+    ActivityBucket.objects.filter(hour__lte=hour - WINDOW_HOURS).delete()
+    scores = defaultdict(float)
+    buckets = ActivityBucket.objects.values_list(
+        'post_id', 'hour', 'comments', 'views'
+    ).iterator()
+    for post_id, bucket_hour, comments, views in buckets:
+        scores[post_id] += score(comments, views, hour - bucket_hour)
+    for post_id, views in _cached_views(hour).items():
+        scores[post_id] += score(0, views, 0)
+    # просмотры из кеша могли остаться от уже удалённых постов
+    candidates = heapq.nlargest(
+        TOP_K * 2, scores.items(), key=itemgetter(1)
+    )
+    alive = set(Post.objects.filter(
+        pk__in=[post_id for post_id, _ in candidates]
+    ).values_list('pk', flat=True))
+    top = [item for item in candidates if item[0] in alive][:TOP_K]
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create([
+            TrendingPost(post_id=post_id, rank=rank, score=value)
+            for rank, (post_id, value) in enumerate(top, 1)
+        ])
+    pagecache.purge('trending')
+    return len(top)
@@ -5,8 +5,18 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('updates/', views.feed_updates, name='feed_updates'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('archive/', views.site_archive, name='archive'),
+    path('archive/<int:year>/<int:month>/',
+         views.site_archive, name='archive'),
     path('new/', views.new_post, name='new_post'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path('group/<slug:slug>/archive/',
+         views.group_archive, name='group_archive'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.group_archive, name='group_archive'),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/follow/',
          views.profile_follow,
@@ -16,6 +26,12 @@ urlpatterns = [
          views.profile_unfollow,
          name='profile_unfollow'
          ),
+    path('<str:username>/followers/', views.followers, name='followers'),
+    path('<str:username>/archive/',
+         views.profile_archive, name='profile_archive'),
+    path('<str:username>/archive/<int:year>/<int:month>/',
+         views.profile_archive, name='profile_archive'),
+    path('<str:username>/following/', views.following, name='following'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit, name='edit'),
     path('<str:username>/<int:post_id>/delete/',
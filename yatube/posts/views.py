@@ -1,19 +1,55 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 
+from core import identity, pagecache, streaming
+from core.paginator import (CachedCountPaginator, KnownCountPaginator,
+                            cached_count, keyset_slice)
+from core.throttle import throttle
+
+from . import archive, deletion, follow_graph, follows, trending
+from .caching import (count_key, feed_head, follow_feed_head, group_or_404,
+                      head_key, user_or_404)
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from .models import Comment, Post, TrendingPost, User
+
+PAGE_SIZE = 10
+FOLLOW_PAGE_SIZE = 30
+UPDATES_LIMIT = 20
+
+
+def feed_fragment(request, post_list):
+    """Only the post cards after the ``before`` cursor, for progressive
+    loading of the next page without the surrounding layout.
+    """
+    posts, next_cursor = keyset_slice(
+        post_list, request.GET.get('before'), PAGE_SIZE
+    )
+    posts = identity.current().attach(posts, 'author', 'group')
+    html = ''.join(
+        render_to_string('post_item.html', {'post': post}, request)
+        for post in posts
+    )
+    return JsonResponse({'html': html, 'next': next_cursor})
 
 
 def index(request):
     post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
+    pagecache.add_tags(request, 'index')
+    if 'fragment' in request.GET:
+        return feed_fragment(request, post_list)
+    paginator = CachedCountPaginator(
+        post_list, PAGE_SIZE, count_key('index')
+    )
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
     main = True
-    return render(
+    return streaming.render(
         request,
         'index.html',
         {'page': page, 'index': main}
@@ -21,12 +57,17 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = group_or_404(slug)
     posts = group.groups.all()
-    paginator = Paginator(posts, 10)
+    pagecache.add_tags(request, f'group:{group.pk}')
+    if 'fragment' in request.GET:
+        return feed_fragment(request, posts)
+    paginator = CachedCountPaginator(
+        posts, PAGE_SIZE, count_key('group', group.pk)
+    )
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
-    return render(
+    return streaming.render(
         request,
         'group.html',
         {'page': page, 'group': group}
@@ -34,29 +75,20 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = user_or_404(username)
     post_list = author.posts.all()
-    count_posts = post_list.count()
-    count_following = author.follower.count()
-    count_followers = author.following.count()
-    paginator = Paginator(post_list, 10)
+    pagecache.add_tags(request, f'author:{author.pk}')
+    if 'fragment' in request.GET:
+        return feed_fragment(request, post_list)
+    paginator = CachedCountPaginator(
+        post_list, PAGE_SIZE, count_key('author', author.pk)
+    )
+    count_posts = paginator.count
+    count_following = follow_graph.following_count(author.pk)
+    count_followers = follow_graph.followers_count(author.pk)
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
-    user = request.user
-    if user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
-        return render(
-            request,
-            'profile.html',
-            {'page': page, 'author': author,
-             'count_posts': count_posts, 'username': username,
-             'following': following, 'count_following': count_following,
-             'count_followers': count_followers}
-        )
-    return render(
+    return streaming.render(
         request,
         'profile.html',
         {'page': page, 'author': author,
@@ -67,13 +99,17 @@ def profile(request, username):
 
 
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
-    author = post.author
-    count_posts = author.posts.all().count()
-    count_following = author.follower.count()
-    count_followers = author.following.count()
+    author = user_or_404(username)
+    post = get_object_or_404(Post, author=author, pk=post_id)
+    identity.current().attach([post], 'author', 'group')
+    count_posts = cached_count(
+        count_key('author', author.pk), author.posts.all()
+    )
+    count_following = follow_graph.following_count(author.pk)
+    count_followers = follow_graph.followers_count(author.pk)
     comments = Comment.objects.filter(post=post)
     form = CommentForm()
+    pagecache.add_tags(request, f'post:{post.pk}', f'author:{author.pk}')
     return render(
         request,
         'post.html',
@@ -86,6 +122,8 @@ def post_view(request, username, post_id):
 
 
 @login_required
+@throttle('new_post')
+@throttle('upload', uploads=True)
 def new_post(request):
     header = 'Добавить запись'
     card_header = 'Новая запись'
@@ -105,6 +143,7 @@ def new_post(request):
 
 
 @login_required
+@throttle('upload', uploads=True)
 def post_edit(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id)
     author = post.author
@@ -147,14 +186,16 @@ def server_error(request):
 
 
 @login_required
+@throttle('comment')
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
+    post = get_object_or_404(Post, author=user_or_404(username), pk=post_id)
     form = CommentForm(request.POST or None,)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        trending.record(post.pk, comments=1)
         return redirect(reverse('post', args=[username, post_id]))
     return redirect(reverse('post', args=[username, post_id]))
 
@@ -162,42 +203,163 @@ def add_comment(request, username, post_id):
 @login_required
 def follow_index(request):
     post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
+    if 'fragment' in request.GET:
+        return feed_fragment(request, post_list)
+    paginator = CachedCountPaginator(
+        post_list, PAGE_SIZE, count_key('follow', request.user.pk)
+    )
     page_number = request.GET.get('page')
     page = paginator.get_page(page_number)
     follow = True
-    return render(
+    cursor = follow_feed_head(request.user.pk)
+    return streaming.render(
         request,
         'follow.html',
-        {'page': page, 'follow': follow}
+        {'page': page, 'follow': follow, 'cursor': cursor}
     )
 
 
 @login_required
+@throttle('follow', methods=None)
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    if not Follow.objects.filter(
-        user=user,
-        author=author
-    ).exists() and user != author:
-        Follow.objects.create(user=user, author=author)
+    author = user_or_404(username)
+    follows.follow(request.user, [author])
     return redirect('profile', username)
 
 
 @login_required
+@throttle('follow', methods=None)
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    follow = Follow.objects.filter(
-        user=user,
-        author=author
-    )
-    if follow.exists() and user != author:
-        follow.delete()
+    author = user_or_404(username)
+    follows.unfollow(request.user, [author])
     return redirect('profile', username)
 
 
+@login_required
+@require_POST
+@throttle('follow')
+def follow_bulk(request):
+    """Follow or unfollow many authors at once, by username.
+
+    ``author`` may be repeated; ``action`` is ``follow`` (the default) or
+    ``unfollow``.
+    """
+    authors = request.POST.getlist('author')
+    action = request.POST.get('action', 'follow')
+    if action == 'follow':
+        author_ids = follows.follow(request.user, authors)
+        return JsonResponse({'followed': len(author_ids)})
+    if action == 'unfollow':
+        return JsonResponse({
+            'unfollowed': follows.unfollow(request.user, authors)
+        })
+    return JsonResponse({'error': 'unknown action'}, status=400)
+
+
+def archive_page(request, context, post_list, feed, object_id=0,
+                 year=None, month=None):
+    """One month of a feed, found by a ``pub_date`` range scan.
+
+    The month list and the page count come from the ``MonthlyCount``
+    rollup; without ``year`` and ``month`` the newest month is shown.
+    """
+    months = archive.months(feed, object_id)
+    if year is None:
+        year, month = months[0][:2] if months else archive.month_of(
+            timezone.now()
+        )
+    if not (1 <= month <= 12 and 1 <= year < 9999):
+        raise Http404
+    count = next(
+        (posts for y, m, posts in months if (y, m) == (year, month)), 0
+    )
+    start, end = archive.month_range(year, month)
+    paginator = KnownCountPaginator(
+        post_list.filter(pub_date__gte=start, pub_date__lt=end),
+        PAGE_SIZE, count
+    )
+    page = paginator.get_page(request.GET.get('page'))
+    context.update({
+        'page': page, 'paginator': paginator, 'months': months,
+        'year': year, 'month': month, 'month_start': start,
+    })
+    return render(request, 'archive.html', context)
+
+
+def site_archive(request, year=None, month=None):
+    pagecache.add_tags(request, 'index')
+    return archive_page(
+        request, {}, Post.objects.all(), 'index', year=year, month=month
+    )
+
+
+def group_archive(request, slug, year=None, month=None):
+    group = group_or_404(slug)
+    pagecache.add_tags(request, f'group:{group.pk}')
+    return archive_page(
+        request, {'group': group}, group.groups.all(), 'group', group.pk,
+        year, month
+    )
+
+
+def profile_archive(request, username, year=None, month=None):
+    author = user_or_404(username)
+    pagecache.add_tags(request, f'author:{author.pk}')
+    return archive_page(
+        request, {'author': author}, author.posts.all(), 'author',
+        author.pk, year, month
+    )
+
+
+def trending_posts(request):
+    """Posts with the most recent activity, read from the top-K table
+    that ``compact_trending`` rebuilds.
+    """
+    pagecache.add_tags(request, 'trending')
+    entries = TrendingPost.objects.filter(
+        post__deleted=False
+    ).select_related('post__author', 'post__group')
+    return render(
+        request,
+        'trending.html',
+        {'posts': [entry.post for entry in entries]}
+    )
+
+
+def follow_list(request, username, direction):
+    """Followers or followees of ``username``, paginated over the ids in
+    the follow graph; only the users on the page are loaded.
+    """
+    author = user_or_404(username)
+    if direction == 'followers':
+        ids = follow_graph.followers(author.pk)
+    else:
+        ids = follow_graph.followees(author.pk)
+    paginator = Paginator(ids, FOLLOW_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    users = User.objects.in_bulk(list(page.object_list))
+    page.object_list = [
+        identity.current().add(users[pk])
+        for pk in page.object_list if pk in users
+    ]
+    return render(
+        request,
+        'follow_list.html',
+        {'page': page, 'author': author, 'username': username,
+         'direction': direction,
+         'count_following': follow_graph.following_count(author.pk),
+         'count_followers': follow_graph.followers_count(author.pk)}
+    )
+
+
+def followers(request, username):
+    return follow_list(request, username, 'followers')
+
+
+def following(request, username):
+    return follow_list(request, username, 'following')
+
+
 @login_required
 def post_delete(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -205,5 +367,45 @@ def post_delete(request, username, post_id):
     user = request.user
     if not author.username == user.username:
         return redirect('post', username=username, post_id=post_id)
-    post.delete()
+    deletion.delete_post(post)
     return redirect('index')
+
+
+def feed_updates(request):
+    """Count and cards of posts newer than the ``after`` cursor.
+
+    The newest post id of every feed is kept in the cache, so a poll with
+    nothing new does not touch the database.
+    """
+    feed = request.GET.get('feed', 'index')
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    if feed == 'group':
+        group = group_or_404(request.GET.get('slug', ''))
+        post_list = group.groups.all()
+        head = feed_head(head_key('group', group.pk), post_list)
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'login required'}, status=403)
+        head = follow_feed_head(request.user.pk)
+        post_list = Post.objects.filter(author__following__user=request.user)
+    else:
+        post_list = Post.objects.all()
+        head = feed_head(head_key('index'), post_list)
+    if head <= after:
+        return JsonResponse({'count': 0, 'cursor': after, 'html': ''})
+    newer = post_list.filter(pk__gt=after)
+    posts = identity.current().attach(
+        newer[:UPDATES_LIMIT], 'author', 'group'
+    )
+    html = ''.join(
+        render_to_string('post_item.html', {'post': post}, request)
+        for post in posts
+    )
+    return JsonResponse({
+        'count': newer.count() if len(posts) == UPDATES_LIMIT else len(posts),
+        'cursor': head,
+        'html': html,
+    })
@@ -0,0 +1,17 @@
+"""
+Settings profile is chosen by the YATUBE_PROFILE environment variable:
+``production`` by default, ``development`` only when asked for.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILE = os.environ.get('YATUBE_PROFILE', 'production')
+
+if PROFILE == 'production':
+    from .production import *  # noqa: F401,F403
+elif PROFILE == 'development':
+    from .development import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(f'Unknown YATUBE_PROFILE: {PROFILE!r}')
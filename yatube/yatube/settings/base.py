@@ -0,0 +1,248 @@
+"""
+Django settings for yatube project.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = '=)$m!+da=yk!-(wj_wji^(^yz%=!87)!_95q==30vp2gjft13@'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+    'www.falkenbach.pythonanywhere.com/',
+    'falkenbach.pythonanywhere.com/'
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'about.apps.AboutConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.throttle.ConcurrencyLimitMiddleware',
+    'core.compression.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.holes.HoleFillingMiddleware',
+    'core.pagecache.PageCacheMiddleware',
+    'core.identity.IdentityMapMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates",)
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Сессия целиком лежит в подписанной куке, а пользователь по id из неё
+# берётся из кэша: запрос залогиненного не ходит в базу ради nav.html.
+# Выход стирает куку у клиента, но украденную куку сервер отозвать не может,
+# пока не сменится пароль или SECRET_KEY.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+# задаём произвольный URL, который будет использоваться для запросов к статическим файлам
+STATIC_URL = '/static/'
+# теперь логотип можно будет запросить по адресу sitename.ex**/static/**images/logo.png
+
+# задаём адрес директории, куда командой *collectstatic* будет собрана вся статика
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# collectstatic добавляет к именам хеш содержимого и кладёт рядом .gz и .br;
+# отдаёт их core.staticfiles.StaticFilesMiddleware из wsgi.py
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# загруженные файлы не меняются под тем же именем, браузер держит их неделю
+MEDIA_CACHE_SECONDS = 7 * 24 * 60 * 60
+# за nginx: префикс internal-локации, которая отдаёт MEDIA_ROOT
+# (например '/protected-media/'); тело ответа тогда отправляет nginx
+MEDIA_ACCEL_REDIRECT = ''
+# за Apache с mod_xsendfile: отдавать файл заголовком X-Sendfile
+MEDIA_X_SENDFILE = False
+# предел размера media/cache/ с миниатюрами; сверх него удаляются
+# давно не запрашивавшиеся
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Login
+
+LOGIN_URL = '/auth/login/'
+LOGIN_REDIRECT_URL = 'index'
+LOGOUT_REDIRECT_URL = 'index'
+
+#  подключаем движок filebased.EmailBackend
+EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+
+# локальный LRU каждого воркера поверх общего для всех воркеров кэша;
+# LOCATION у 'default' - это алиас общего кэша
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CHECK_INTERVAL': 1,
+            'LOCAL_TIMEOUT': 60,
+            'LOCK_DIR': os.path.join(BASE_DIR, 'cache_data', 'locks'),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache_data'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# сколько секунд после истечения отдаём устаревший фрагмент, пока один
+# запрос пересчитывает его, и на сколько берём блокировку пересчёта
+SWR_STALE_SECONDS = 300
+SWR_LOCK_SECONDS = 10
+
+# «запросов/период» на пользователя (гостя — на IP) для пишущих view;
+# корзина вмещает столько же запросов подряд
+THROTTLE_RATES = {
+    'new_post': '10/minute',
+    'upload': '5/minute',
+    'comment': '20/minute',
+    'follow': '60/minute',
+}
+# None — корзины в памяти процесса; имя из CACHES — общие для всех воркеров
+THROTTLE_CACHE = None
+# сверх стольких одновременных запросов процесс сразу отвечает 503
+MAX_CONCURRENT_REQUESTS = 64
+RETRY_AFTER_SECONDS = 5
+
+# число записей в лентах берём из кэша и раз в PAGINATOR_COUNT_REFRESH
+# секунд пересчитываем в фоне; в пагинаторе показываем только
+# PAGINATOR_WINDOW страниц по обе стороны от текущей
+PAGINATOR_COUNT_TIMEOUT = 60 * 60
+PAGINATOR_COUNT_REFRESH = 60
+PAGINATOR_WINDOW = 3
+
+# страницы, которые отдаются целиком из кэша (персональные части
+# подставляет HoleFillingMiddleware); сбрасываются по тегам при записи
+PAGE_CACHE_VIEWS = [
+    'index', 'group', 'profile', 'post', 'trending',
+    'archive', 'group_archive', 'profile_archive',
+]
+PAGE_CACHE_SECONDS = 60 * 10
+
+# Сколько запросов к базе сэкономила карта объектов запроса, выводим в
+# заголовок X-Identity-Map.
+IDENTITY_MAP_HEADER = DEBUG
+
+# Сжатие ответов: короткие не сжимаем, уровень подобран для сжатия на лету.
+COMPRESS_MIN_LENGTH = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# при старте WSGI-процесса заранее собрать резолвер URL и скомпилировать
+# шаблоны; имеет смысл только с кэширующим загрузчиком шаблонов
+WARM_UP = False
@@ -0,0 +1,30 @@
+"""Production: no debug apps, cached templates, warmed up on start."""
+
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATES_DIR
+
+DEBUG = False
+
+# шаблоны компилируются один раз на процесс, а не на каждый запрос;
+# context_processors.debug без DEBUG ничего не добавляет и убран
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+WARM_UP = True
@@ -13,12 +13,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.apps import apps
 from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core import media, thumbnails
+
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
 
@@ -26,14 +29,17 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', media.serve,
+         name='media'),
+    path('thumbnail/<str:token>/', thumbnails.serve, name='thumbnail'),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
 
 if settings.DEBUG:
-    import debug_toolbar
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
+
+if apps.is_installed('debug_toolbar'):
+    import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)